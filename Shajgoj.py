@@ -1,82 +1,173 @@
+import argparse
 import asyncio
-import json
-from playwright.async_api import async_playwright
+import orjson
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+# Categories to scrape, each in its own browser context
+CATEGORY_URL = 'https://shop.shajgoj.com/product-category/{slug}?page=1'
+CATEGORIES = [
+    'body-1',
+]
+
+# How many categories are scraped at the same time
+MAX_CONCURRENT_CATEGORIES = 5
+
+# How long to wait for the next batch of products after a scroll (ms)
+SCROLL_LOAD_TIMEOUT = 5000
+
+# Stop once this many scrolls in a row produced no new products
+MAX_STALE_SCROLLS = 3
+
+# Only titles and prices are read, so skip everything that isn't needed to
+# render them (scripts, XHR and fetch stay - they drive the infinite scroll)
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet', 'other'}
+BLOCKED_HOSTS = ('google-analytics.com', 'googletagmanager.com', 'facebook.net', 'doubleclick.net')
+
+async def block_unneeded_requests(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def scrape_category(browser, category_slug):
+    # A tall viewport renders more products per screen, so fewer scrolls are needed
+    context = await browser.new_context(viewport={'width': 1280, 'height': 2000})
+    await context.route('**/*', block_unneeded_requests)
+    try:
+        return await scrape_one(context, CATEGORY_URL.format(slug=category_slug))
+    finally:
+        await context.close()
+
+async def scrape_one(context, url):
+    page = await context.new_page()
+    page.set_default_timeout(60000)
+
+    # Go to the page
+    await page.goto(url)
+
+    products_list = []
+    seen_names = set()  # Guards against the same product being listed twice
+    processed_count = 0  # Products already read from the DOM, later passes start after them
+    stale_scrolls = 0
+
+    # Wait for the product container to load
+    try:
+        await page.wait_for_selector("p.text-gray-700[title]")
+    except Exception as e:
+        print(f"Error waiting for product container on {url}: {e}")
+        return products_list
+
+    # Collect the rendered products, then scroll to the bottom to trigger the
+    # infinite scroll, until several scrolls in a row bring in nothing new
+    while True:
+        unique_before = len(seen_names)
+
+        # Query the newly rendered products and prices in a single round trip
+        try:
+            items = await page.evaluate("""(start) => {
+                const products = document.querySelectorAll('p.text-gray-700[title]');
+                const prices = document.querySelectorAll('span.text-sg-pink.font-semibold');
+                const count = Math.min(products.length, prices.length);
+                const items = [];
+                for (let i = start; i < count; i++) {
+                    items.push({
+                        product_name: products[i].getAttribute('title'),
+                        price: prices[i].innerText
+                    });
+                }
+                return items;
+            }""", processed_count)
+            processed_count += len(items)
+
+            print(f"Found {len(items)} new products with prices ({processed_count} so far).")
+
+            for item in items:
+                if item['product_name'] in seen_names:
+                    continue
+                seen_names.add(item['product_name'])
+                print(f"Product: {item['product_name']}, Price: {item['price']}")
+
+                # Store the product name and price as a dictionary
+                products_list.append(item)
 
-async def run_playwright():
-    async with async_playwright() as p:
-        # Launch Firefox browser (headless=False for debugging)
-        browser = await p.firefox.launch(headless=False)
-        page = await browser.new_page()
-        page.set_default_timeout(60000)
+        except Exception as e:
+            print(f"Error querying product elements: {e}")
 
-        # Go to the page
-        await page.goto('https://shop.shajgoj.com/product-category/body-1?page=1')
+        # Count scrolls in a row that produced nothing new
+        stale_scrolls = stale_scrolls + 1 if len(seen_names) == unique_before else 0
+        if stale_scrolls >= MAX_STALE_SCROLLS:
+            print(f"No new products on {url} after {stale_scrolls} scrolls, reached the end.")
+            break
 
-        products_list = []
+        rendered = await page.evaluate("""() => {
+            window.scrollTo(0, document.body.scrollHeight);
+            return document.querySelectorAll('p.text-gray-700[title]').length;
+        }""")
+        print(f"Scrolling to the bottom ({rendered} products rendered)...")
 
-        # Wait for the product container to load
+        # Wait for the next batch of products to render
         try:
-            await page.wait_for_selector("p.text-gray-700[title]")
-        except Exception as e:
-            print(f"Error waiting for product container: {e}")
-            return
-
-        # Scroll every 15 seconds by 100vh (100% of the viewport height)
-        while True:
-            # Calculate 100vh in pixels
-            vh = await page.evaluate("window.innerHeight")  # Full viewport height in pixels
-            print(f"Scrolling by {vh}px (100vh)...")
-            await page.evaluate(f"window.scrollBy(0, {vh});")
-
-            # Wait for 15 seconds before the next scroll
-            await asyncio.sleep(3)
-
-            # After scrolling, query the products and prices
-            try:
-                products = await page.query_selector_all("p.text-gray-700[title]")
-                prices = await page.query_selector_all("span.text-sg-pink.font-semibold")
-
-                print(f"Found {len(products)} products and {len(prices)} prices.")
-
-                # Iterate through products and prices and extract the required information
-                for product, price in zip(products, prices):
-                    try:
-                        product_name = await product.get_attribute("title")
-                        product_price = await price.inner_text()
-                        print(f"Product: {product_name}, Price: {product_price}")
-
-                        # Store the product name and price as a dictionary
-                        products_list.append({
-                            "product_name": product_name,
-                            "price": product_price
-                        })
-                    except Exception as e:
-                        print(f"Error extracting product data: {e}")
-
-            except Exception as e:
-                print(f"Error querying product elements: {e}")
-
-            # Add a break condition or a timeout after a certain number of scrolls or when no new content is loaded
-            # For now, we will stop after collecting 50 products
-            if len(products_list) > 800:  # Adjust this number based on the expected number of products
-                break
-
-        # Save the collected data to a JSON file
-        
-        file_name = input("Enter name of file: ")
-
-        with open(file_name, 'w', encoding='utf-8') as json_file:
-            json.dump(products_list, json_file, ensure_ascii=False, indent=4)
+            await page.wait_for_function(
+                "(n) => document.querySelectorAll('p.text-gray-700[title]').length > n",
+                arg=rendered,
+                timeout=SCROLL_LOAD_TIMEOUT
+            )
+        except PlaywrightTimeoutError:
+            print(f"No new products loaded on {url} within {SCROLL_LOAD_TIMEOUT}ms.")
+
+    await page.close()
+    return products_list
+
+async def run_playwright(file_name, debug=False):
+    async with async_playwright() as p:
+        # Launch the browser once and share it across categories; contexts are
+        # cheap compared to a browser start. Headless Chromium is lighter per
+        # context, --debug switches back to a visible Firefox window.
+        if debug:
+            browser = await p.firefox.launch(headless=False)
+        else:
+            browser = await p.chromium.launch(
+                headless=True,
+                args=['--disable-blink-features=AutomationControlled', '--no-sandbox']
+            )
+
+        # Each category gets a fresh context so they can scroll concurrently
+        # without sharing cookies or page state
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CATEGORIES)
+
+        # A failing category is logged and skipped so the others still get saved
+        async def scrape_bounded(category_slug):
+            async with semaphore:
+                try:
+                    return await scrape_category(browser, category_slug)
+                except Exception as e:
+                    print(f"Error scraping category {category_slug}: {e}")
+                    return []
+
+        results = await asyncio.gather(*(scrape_bounded(slug) for slug in CATEGORIES))
+        products_list = [product for result in results for product in result]
 
         # Close the browser
         await browser.close()
 
+    # Save the collected data to a JSON file
+    with open(file_name, 'wb') as json_file:
+        json_file.write(orjson.dumps(products_list, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+
     # Print the collected product names and prices
     print("Collected product names and prices:", products_list)
 
 # Function to run the asyncio event loop
 def main():
-    asyncio.run(run_playwright())
+    parser = argparse.ArgumentParser(description="Scrape product names and prices from Shajgoj.")
+    parser.add_argument("--debug", action="store_true", help="Use a visible Firefox window instead of headless Chromium")
+    args = parser.parse_args()
+
+    # Ask for the output file up front so nothing waits on stdin once scraping is done
+    file_name = input("Enter name of file: ")
+
+    asyncio.run(run_playwright(file_name, debug=args.debug))
 
 if __name__ == "__main__":
     main()
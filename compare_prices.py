@@ -1,17 +1,35 @@
+import csv
 import json
 import re
 import argparse
 import sys
+from collections import defaultdict, namedtuple
+from functools import lru_cache
 from pathlib import Path
 
 try:
-    from thefuzz import fuzz
-    from thefuzz import process
+    import numpy as np
+    from rapidfuzz import fuzz
+    from rapidfuzz import process
+    from scipy.optimize import linear_sum_assignment
 except ImportError:
-    print("Error: 'thefuzz' package is required.")
-    print("Please install it by running: pip install thefuzz[speedup]")
+    print("Error: 'rapidfuzz', 'numpy' and 'scipy' packages are required.")
+    print("Please install them by running: pip install rapidfuzz numpy scipy")
     sys.exit(1)
 
+# orjson is optional; it parses large scraper dumps a few times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Volume, weight, etc. (e.g. - 30ml, 50g, 1oz, 30 ml). A leading dash or
+# whitespace is left behind and cleaned up by the later passes, so the
+# pattern can start matching at a digit instead of at every position.
+_QUANTITY_RE = re.compile(r'\b\d+(?:\.\d+)?\s*(?:ml|g|oz|kg|l)\b')
+# Anything except alphanumeric and spaces
+_SPECIAL_CHARS_RE = re.compile(r'[^a-z0-9\s]')
+
 def normalize_name(name):
     """
     Standardize the product name to improve fuzzy matching ratios.
@@ -20,31 +38,41 @@ def normalize_name(name):
     if not isinstance(name, str):
         return ""
         
+    return _normalize_str(name)
+
+@lru_cache(maxsize=131072)
+def _normalize_str(name):
+    # Brand and product phrasing repeats a lot across listings, so the
+    # result is cached per raw name.
+    
     # Lowercase
     name = name.lower()
     
-    # Remove volume, weight, etc. (e.g. - 30ml, 50g, 1oz, 30 ml)
-    name = re.sub(r'(?:-?\s*)\b\d+(?:\.\d+)?\s*(?:ml|g|oz|kg|l)\b', '', name)
+    # Remove volume, weight, etc.
+    name = _QUANTITY_RE.sub('', name)
     
     # Remove special characters except alphanumeric and spaces
-    name = re.sub(r'[^a-z0-9\s]', ' ', name)
+    name = _SPECIAL_CHARS_RE.sub(' ', name)
     
     # Remove extra spaces
     name = ' '.join(name.split())
     
     return name
 
+# Fields that may hold a price, in order of preference
+PRICE_FIELDS = ('price', 'sale_price', 'regular_price', 'price_formatted')
+
+# Number in strings like "৳ 1,200", "550 Taka", "1,200"
+_PRICE_RE = re.compile(r'([\d,]+(?:\.\d+)?)')
+
 def extract_price(product_dict):
     """
     Try to extract a numeric price from possible price fields across different scrapers.
     """
-    price_fields = ['price', 'sale_price', 'regular_price', 'price_formatted']
-    
-    for field in price_fields:
+    for field in PRICE_FIELDS:
         val = product_dict.get(field)
         if val:
-            # Extract number from string like "৳ 1,200", "550 Taka", "1,200"
-            match = re.search(r'([\d,]+(?:\.\d+)?)', str(val))
+            match = _PRICE_RE.search(val if isinstance(val, str) else str(val))
             if match:
                 try:
                     return float(match.group(1).replace(',', ''))
@@ -52,19 +80,171 @@ def extract_price(product_dict):
                     continue
     return None
 
+# Tokens that appear in more than this share of the second file's products
+# (e.g. "cream", "serum") are too common to narrow down candidates.
+BLOCKING_MAX_TOKEN_SHARE = 0.1
+
+def tokenize(normalized_name):
+    """
+    Return the name's unique tokens, sorted and space-joined.
+    token_set_ratio only looks at the token sets, so this is computed once per
+    product instead of being redone inside the scorer for every pair.
+    """
+    return ' '.join(sorted(set(normalized_name.split())))
+
+def build_token_index(token_strings):
+    """
+    Build an inverted index mapping each token to the indices of the products containing it.
+    """
+    index = defaultdict(set)
+    for j, tokens in enumerate(token_strings):
+        for token in tokens.split():
+            index[token].add(j)
+    return index
+
+def candidate_indices(tokens, index, max_postings):
+    """
+    Return the indices of products sharing at least one informative token with `tokens`.
+    Falls back to every shared token when the name is made up only of common ones.
+    """
+    postings = [index[t] for t in tokens.split() if t in index]
+    rare = [p for p in postings if len(p) <= max_postings]
+    return set().union(*(rare or postings))
+
+# Above this many file1 x file2 cells the dense score matrix (and the
+# assignment solver's float copy of it) gets too big to hold in memory.
+MAX_MATRIX_CELLS = 25_000_000
+
+def match_exact(names1, names2):
+    """
+    Pair products whose normalized names are identical, each file 2 product at most once.
+    Returns a list of (index1, index2, score) tuples with a score of 100.
+    """
+    by_name = defaultdict(list)
+    for j, name in enumerate(names2):
+        if name:
+            by_name[name].append(j)
+    for indices in by_name.values():
+        indices.reverse()  # pop() hands out the first occurrence first
+    
+    pairs = []
+    for i, name in enumerate(names1):
+        indices = by_name.get(name)
+        if indices:
+            pairs.append((i, indices.pop(), 100))
+    return pairs
+
+# File 1 products whose candidate pairs are scored per batch; bounds the size
+# of the pair lists handed to RapidFuzz
+SCORING_BATCH_ROWS = 2000
+
+def score_candidates(tokens1, tokens2, token_index, max_postings, threshold):
+    """
+    Score every blocked candidate pair, one batch of file 1 products at a time.
+    Yields (rows, cols, scores) arrays holding only the pairs that reach the threshold.
+    """
+    for start in range(0, len(tokens1), SCORING_BATCH_ROWS):
+        rows = []
+        cols = []
+        for i in range(start, min(start + SCORING_BATCH_ROWS, len(tokens1))):
+            candidates = sorted(candidate_indices(tokens1[i], token_index, max_postings))
+            rows.extend([i] * len(candidates))
+            cols.extend(candidates)
+        if not rows:
+            continue
+            
+        # cpdist scores the aligned pair lists in C on all cores with the GIL
+        # released, and zeroes out anything below the threshold. The cutoff is
+        # checked before the uint8 rounding, so lower it by half a point to keep
+        # matches that round up to the threshold, as thefuzz's integer scores did
+        scores = process.cpdist(
+            [tokens1[i] for i in rows], [tokens2[j] for j in cols],
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=threshold - 0.5,
+            dtype=np.uint8,
+            workers=-1
+        )
+        keep = (scores > 0) & (scores >= threshold)
+        yield np.array(rows, dtype=np.intp)[keep], np.array(cols, dtype=np.intp)[keep], scores[keep]
+
+def match_optimal(tokens1, tokens2, token_index, max_postings, threshold):
+    """
+    Score the blocked candidate pairs into a matrix and solve it as an assignment problem.
+    Returns a list of (index1, index2, score) tuples.
+    """
+    scores = np.zeros((len(tokens1), len(tokens2)), dtype=np.uint8)
+    for rows, cols, batch_scores in score_candidates(tokens1, tokens2, token_index, max_postings, threshold):
+        scores[rows, cols] = batch_scores
+    
+    # Solve the pairing as an assignment problem instead of greedily taking the
+    # best column per row, so an early product can't steal a match that fits a
+    # later one better. Only rows/columns with at least one score above the
+    # threshold take part, which keeps the solver's matrix small.
+    rows = np.flatnonzero(scores.any(axis=1))
+    cols = np.flatnonzero(scores.any(axis=0))
+    sub_scores = scores[np.ix_(rows, cols)]
+    row_ind, col_ind = linear_sum_assignment(sub_scores, maximize=True)
+    
+    pairs = []
+    for r, c in zip(row_ind, col_ind):
+        score = int(sub_scores[r, c])
+        if score and score >= threshold:
+            pairs.append((int(rows[r]), int(cols[c]), score))
+    return pairs
+
+def match_greedy(tokens1, tokens2, token_index, max_postings, threshold):
+    """
+    Match each file 1 product to its best still-unmatched file 2 candidate.
+    Used when the score matrix would be too large; only the pairs that reach
+    the threshold are ever held in memory.
+    Returns a list of (index1, index2, score) tuples.
+    """
+    batches = list(score_candidates(tokens1, tokens2, token_index, max_postings, threshold))
+    if not batches:
+        return []
+    rows = np.concatenate([b[0] for b in batches])
+    cols = np.concatenate([b[1] for b in batches])
+    scores = np.concatenate([b[2] for b in batches])
+    
+    # Walk the pairs by file 1 order, best score first within a product, and
+    # take the first one whose file 2 product is still free
+    order = np.lexsort((cols, -scores.astype(np.int16), rows))
+    taken = np.zeros(len(tokens2), dtype=bool)
+    pairs = []
+    last_row = -1
+    for r, c, score in zip(rows[order].tolist(), cols[order].tolist(), scores[order].tolist()):
+        if r == last_row or taken[c]:
+            continue
+        taken[c] = True
+        last_row = r
+        pairs.append((r, c, score))
+    return pairs
+
+# Products are kept as parallel lists (one per field) rather than a list of
+# dicts, so the matching code walks compact lists of exactly what it needs.
+Products = namedtuple('Products', ['names', 'normalized_names', 'tokens', 'prices', 'urls'])
+
 def load_products(filepath):
     """
-    Reads a JSON file and attempts to extract a list of products.
-    Handles different JSON structures (list of dicts, or dict with 'products' list).
+    Reads a JSON file and attempts to extract its products as parallel lists.
+    Handles different JSON structures (list of dicts, dict with 'products' list,
+    or JSON Lines with one product per line).
     """
+    loaded = Products([], [], [], [], [])
+    loads = orjson.loads if orjson is not None else json.loads
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if Path(filepath).suffix == '.jsonl':
+            with open(filepath, 'rb') as f:
+                data = [loads(line) for line in f if line.strip()]
+        elif orjson is not None:
+            data = orjson.loads(Path(filepath).read_bytes())
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
             
         # Handle dicts with a 'products' array vs raw arrays
         products = data.get('products', data) if isinstance(data, dict) else data
         
-        parsed = []
         for p in products:
             if not isinstance(p, dict):
                 continue
@@ -73,25 +253,42 @@ def load_products(filepath):
             if not name:
                 continue
                 
-            price = extract_price(p)
-            parsed.append({
-                'original_name': name,
-                'normalized_name': normalize_name(name),
-                'price': price,
-                'url': p.get('url') or p.get('product_url') or p.get('relative_url') or 'N/A'
-            })
+            normalized_name = normalize_name(name)
+            loaded.names.append(name)
+            loaded.normalized_names.append(normalized_name)
+            loaded.tokens.append(tokenize(normalized_name))
+            loaded.prices.append(extract_price(p))
+            loaded.urls.append(p.get('url') or p.get('product_url') or p.get('relative_url') or 'N/A')
             
-        return parsed
+        return loaded
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
-        return []
+        return Products([], [], [], [], [])
 
-def print_progress(current, total):
-    """Print a simple progress bar."""
-    percent = (current / total) * 100
-    bar = '=' * int(percent / 2) + '-' * (50 - int(percent / 2))
-    sys.stdout.write(f'\rComparing: [{bar}] {percent:.1f}%')
-    sys.stdout.flush()
+def format_price(value):
+    """Format a price for the CSV, or 'N/A' when it is missing."""
+    return f"৳ {value}" if value is not None else 'N/A'
+
+def iter_csv_rows(pairs, products1, products2):
+    """
+    Yield one CSV row per (index1, index2, score) match.
+    Price differences are computed for all matches at once with NumPy; a
+    missing (or zero) price on either side yields 'N/A'.
+    """
+    prices1 = np.array([price or np.nan for price in products1.prices], dtype=float)
+    prices2 = np.array([price or np.nan for price in products2.prices], dtype=float)
+    idx1 = np.array([i for i, _, _ in pairs], dtype=np.intp)
+    idx2 = np.array([j for _, j, _ in pairs], dtype=np.intp)
+    diffs = np.round(prices1[idx1] - prices2[idx2], 2).tolist()
+    
+    for (i, j, score), diff in zip(pairs, diffs):
+        yield [
+            score, 
+            products1.names[i], format_price(products1.prices[i]), 
+            products2.names[j], format_price(products2.prices[j]), 
+            format_price(diff if diff == diff else None),
+            products1.urls[i], products2.urls[j]
+        ]
 
 def main():
     parser = argparse.ArgumentParser(description="Compare product prices using fuzzy matching.")
@@ -99,6 +296,7 @@ def main():
     parser.add_argument("file2", help="Path to second JSON file")
     parser.add_argument("--threshold", type=int, default=85, help="Fuzzy match threshold (0-100), default 85")
     parser.add_argument("--output", default="price_comparison.csv", help="Output CSV file (default: price_comparison.csv)")
+    parser.add_argument("--drop-nulls", action="store_true", help="Skip matches where either product has no price")
     
     args = parser.parse_args()
     
@@ -114,70 +312,59 @@ def main():
         
     print(f"Loading {file1_path.name}...")
     products1 = load_products(file1_path)
-    print(f"Loaded {len(products1)} products.")
+    print(f"Loaded {len(products1.names)} products.")
     
     print(f"Loading {file2_path.name}...")
     products2 = load_products(file2_path)
-    print(f"Loaded {len(products2)} products.")
+    print(f"Loaded {len(products2.names)} products.")
     
-    if not products1 or not products2:
+    if not products1.names or not products2.names:
         print("Error: One or both files had no readable products.")
         return
         
     print(f"Comparing products with fuzzy threshold >= {args.threshold}...")
     
-    matches = []
-    
     # We use token_set_ratio which handles string lengths and word order excellently.
     # Ex: token_set_ratio("Anua Heartleaf", "Heartleaf Anua Toner - 30ml") is robust.
     
-    # Keep track of matched indices in file 2 to prevent duplicates mapping to the same product
-    matched_file2_indices = set()
-    total_products = len(products1)
+    # Products with identical normalized names are paired up front with a dict
+    # lookup, leaving only the rest for fuzzy scoring.
+    pairs = match_exact(products1.normalized_names, products2.normalized_names)
+    exact1 = {i for i, _, _ in pairs}
+    exact2 = {j for _, j, _ in pairs}
+    rest1 = [i for i in range(len(products1.names)) if i not in exact1]
+    rest2 = [j for j in range(len(products2.names)) if j not in exact2]
+    print(f"Matched {len(pairs)} products by exact name, fuzzy matching the rest...")
     
-    for i, p1 in enumerate(products1):
-        if i % 10 == 0 or i == total_products - 1:
-            print_progress(i + 1, total_products)
-            
-        best_match = None
-        best_score = 0
-        best_idx = -1
-        
-        for j, p2 in enumerate(products2):
-            if j in matched_file2_indices:
-                continue
-                
-            score = fuzz.token_set_ratio(p1['normalized_name'], p2['normalized_name'])
-            
-            if score > best_score:
-                best_score = score
-                best_match = p2
-                best_idx = j
-                
-            if best_score == 100:
-                break
-                
-        if best_match and best_score >= args.threshold:
-            matches.append({
-                'score': best_score,
-                'f1_name': p1['original_name'],
-                'f1_price': p1['price'],
-                'f2_name': best_match['original_name'],
-                'f2_price': best_match['price'],
-                'f1_url': p1['url'],
-                'f2_url': best_match['url'],
-                'diff': (p1['price'] - best_match['price']) if (p1['price'] and best_match['price']) else None
-            })
-            matched_file2_indices.add(best_idx)
-            
-    print(f"\nFound {len(matches)} matching products!")
+    # Only score pairs that share at least one informative token - products
+    # with nothing in common can't reach the threshold, and skipping them
+    # removes the vast majority of the N x M comparisons.
+    tokens1 = [products1.tokens[i] for i in rest1]
+    tokens2 = [products2.tokens[j] for j in rest2]
+    token_index = build_token_index(tokens2)
+    max_postings = max(1, int(len(tokens2) * BLOCKING_MAX_TOKEN_SHARE))
+    
+    if len(tokens1) * len(tokens2) <= MAX_MATRIX_CELLS:
+        fuzzy_pairs = match_optimal(tokens1, tokens2, token_index, max_postings, args.threshold)
+    else:
+        print("Too many products for a full score matrix, falling back to greedy matching...")
+        fuzzy_pairs = match_greedy(tokens1, tokens2, token_index, max_postings, args.threshold)
+    pairs.extend((rest1[i], rest2[j], score) for i, j, score in fuzzy_pairs)
+    
+    print(f"Found {len(pairs)} matching products!")
+    
+    if args.drop_nulls:
+        pairs = [
+            (i, j, score) for i, j, score in pairs
+            if products1.prices[i] is not None and products2.prices[j] is not None
+        ]
+        print(f"Keeping {len(pairs)} matches with prices on both sides.")
     
     # Sort matches by score descending
-    matches.sort(key=lambda x: x['score'], reverse=True)
+    pairs.sort(key=lambda x: x[2], reverse=True)
     
-    # Write to CSV
-    import csv
-    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+    # Write to CSV through a large buffer so rows are flushed in big chunks
+    with open(args.output, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow([
             'Match Score', 
@@ -189,19 +376,7 @@ def main():
             f'{file1_path.stem} URL',
             f'{file2_path.stem} URL'
         ])
-                         
-        for m in matches:
-            diff_str = f"৳ {round(m['diff'], 2)}" if m['diff'] is not None else 'N/A'
-            f1_price_str = f"৳ {m['f1_price']}" if m['f1_price'] is not None else 'N/A'
-            f2_price_str = f"৳ {m['f2_price']}" if m['f2_price'] is not None else 'N/A'
-            
-            writer.writerow([
-                m['score'], 
-                m['f1_name'], f1_price_str, 
-                m['f2_name'], f2_price_str, 
-                diff_str,
-                m['f1_url'], m['f2_url']
-            ])
+        writer.writerows(iter_csv_rows(pairs, products1, products2))
             
     print(f"Comparison saved to {args.output}")
     print(f"To view it easily, you can open {args.output} in Excel.")
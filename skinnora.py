@@ -1,11 +1,18 @@
 import asyncio
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-import json
+from contextlib import asynccontextmanager
+import aiofiles
+import aiohttp
+from aiolimiter import AsyncLimiter
+from playwright.async_api import async_playwright, Playwright, TimeoutError as PlaywrightTimeoutError
+from selectolax.lexbor import LexborHTMLParser
+import orjson
 import logging
-from datetime import datetime
+import random
+import re
+from datetime import datetime, timezone
 import os
 from typing import List, Dict, Optional
-import traceback
+from urllib.parse import urljoin
 
 # Configure logging
 logging.basicConfig(
@@ -18,71 +25,380 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+LAUNCH_ARGS = [
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--blink-settings=imagesEnabled=false',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--mute-audio'
+]
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1280, 'height': 800},
+    'user_agent': USER_AGENT
+}
+
+# One Playwright driver process shared by every scraper in this process
+_PW_SINGLETON: Optional[Playwright] = None
+
+async def get_playwright() -> Playwright:
+    global _PW_SINGLETON
+    if _PW_SINGLETON is None:
+        _PW_SINGLETON = await async_playwright().start()
+    return _PW_SINGLETON
+
+async def stop_playwright():
+    global _PW_SINGLETON
+    if _PW_SINGLETON is not None:
+        await _PW_SINGLETON.stop()
+        _PW_SINGLETON = None
+
+# CSS selectors shared by the HTML parser and the in-page extractor. Each field
+# is one compound selector, so the first match in document order wins
+SELECTORS = {
+    'product': '.products li.product',
+    'name': '.woocommerce-loop-product__title, h2, .product-title, [itemprop="name"]',
+    'price': '.price, .amount, .woocommerce-Price-amount',
+    'link': 'a.woocommerce-LoopProduct-link, a[href*="product"], .product-title a',
+    'image': 'img, .wp-post-image, .attachment-woocommerce_thumbnail',
+    'categories': '.loop-product-categories',
+    'sale_badge': '.onsale',
+    'sku': '.product-sku'
+}
+
+# Installed on every browser context as an init script, so V8 compiles it once
+# per context instead of parsing the source on every page. Returns the page's
+# products plus the highest page number in the pagination.
+EXTRACTOR_JS = '''
+window.__skinnora_extract = (SEL) => {
+    // SEL holds one compound selector per field; the browser's
+    // selector engine handles the fallbacks
+    const products = [];
+    const productElements = document.querySelectorAll(SEL.product);
+
+    productElements.forEach((product, index) => {
+        try {
+            // Get product name
+            const nameElement = product.querySelector(SEL.name);
+            const name = nameElement && nameElement.textContent ? nameElement.textContent.trim() : '';
+
+            // Get price
+            let regularPrice = '';
+            let salePrice = '';
+
+            const priceElement = product.querySelector(SEL.price);
+            if (priceElement) {
+                const saleIns = priceElement.querySelector('ins');
+                const saleDel = priceElement.querySelector('del');
+
+                if (saleIns && saleDel) {
+                    regularPrice = saleDel.textContent.trim();
+                    salePrice = saleIns.textContent.trim();
+                } else {
+                    regularPrice = priceElement.textContent.trim();
+                }
+            }
+
+            // Get product URL
+            const linkElement = product.querySelector(SEL.link);
+            const productUrl = linkElement && linkElement.href ? linkElement.href : '';
+
+            // Get image URL
+            const imageElement = product.querySelector(SEL.image);
+            const imageUrl = imageElement && imageElement.src ? imageElement.src : '';
+
+            // Get categories
+            const categoriesElement = product.querySelector(SEL.categories);
+            const categories = categoriesElement ? categoriesElement.textContent.trim() : '';
+
+            // Get sale badge
+            const saleBadge = !!product.querySelector(SEL.sale_badge);
+
+            // Get SKU if available
+            const skuElement = product.querySelector(SEL.sku);
+            const sku = skuElement ? skuElement.textContent.replace('SKU:', '').trim() : '';
+
+            if (name) {
+                products.push({
+                    index: index + 1,
+                    name: name,
+                    regular_price: regularPrice,
+                    sale_price: salePrice,
+                    is_on_sale: saleBadge,
+                    product_url: productUrl,
+                    image_url: imageUrl,
+                    categories: categories,
+                    sku: sku,
+                    scraped_at: new Date().toISOString()
+                });
+            } else {
+                console.log(`Product ${index + 1} has no name, skipping`);
+            }
+
+        } catch (error) {
+            console.log(`Error parsing product ${index + 1}:`, error);
+        }
+    });
+
+    // Highest page number in the pagination
+    let totalPages = 1;
+    const pagination = document.querySelector('nav.woocommerce-pagination');
+    if (pagination) {
+        pagination.querySelectorAll('.page-numbers').forEach(el => {
+            const num = parseInt(el.textContent.trim());
+            if (!isNaN(num) && num > totalPages) {
+                totalPages = num;
+            }
+        });
+    }
+
+    return {products: products, total_pages: totalPages};
+};
+'''
+
+# The extractor only reads the DOM (img.src is an attribute), so none of these need downloading
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+BLOCKED_HOSTS = ('googletagmanager.com', 'google-analytics.com', 'facebook.net')
+
+def is_blocked(request) -> bool:
+    return request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS)
+
+async def block_unneeded_requests(route):
+    if is_blocked(route.request):
+        await route.abort()
+    else:
+        await route.continue_()
+
+def log_request_failed(request):
+    # Requests aborted by block_unneeded_requests also fire requestfailed; keep them out of the warnings
+    if is_blocked(request):
+        logger.debug(f"Request blocked: {request.url}")
+    else:
+        logger.warning(f"Request failed: {request.url} - {request.failure}")
+
+class ContextPool:
+    """Fixed set of browser contexts that scraping tasks borrow and hand back"""
+    
+    def __init__(self, browser, pool_size: int, **context_options):
+        self.browser = browser
+        self.pool_size = pool_size
+        self.context_options = context_options
+        self._contexts = []
+        self._available = asyncio.Queue()
+        
+    async def start(self):
+        """Create all contexts up front so tasks never pay for context creation"""
+        for _ in range(self.pool_size):
+            context = await self.browser.new_context(**self.context_options)
+            self._contexts.append(context)
+            self._available.put_nowait(context)
+        return self
+    
+    async def add_init_script(self, script: str):
+        """Install a script that runs in every page opened from the pool"""
+        for context in self._contexts:
+            await context.add_init_script(script)
+    
+    async def route(self, url, handler):
+        """Install a request route handler on every context in the pool"""
+        for context in self._contexts:
+            await context.route(url, handler)
+    
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a context, waiting until one is free, and return it afterwards"""
+        context = await self._available.get()
+        try:
+            yield context
+        finally:
+            self.release(context)
+    
+    def release(self, context):
+        self._available.put_nowait(context)
+    
+    async def close(self):
+        for context in self._contexts:
+            await context.close()
+        self._contexts.clear()
+
 class SkinnoraScraper:
-    def __init__(self, headless: bool = False, max_retries: int = 3, timeout: int = 30000):
+    def __init__(self, headless: bool = True, max_retries: int = 3, timeout: int = 30000, concurrency: int = 8,
+                 use_browser: bool = False, debug: bool = False):
         self.base_url = "https://www.skinnora.com/shop"
         self.headless = headless
         self.max_retries = max_retries
         self.timeout = timeout
-        self.all_products = []
-        self.failed_pages = []
-        self.current_page = 1
+        self.concurrency = concurrency
+        # The shop listing is server-rendered, so plain HTTP + HTML parsing is
+        # enough; the Playwright path is kept as a fallback
+        self.use_browser = use_browser
+        # Screenshots are only useful when debugging the browser path
+        self.debug = debug
+        self.total_products = 0
+        self.products_on_sale = 0
+        # product_key of everything already written, so repeats across pages
+        # (or across a resumed run) are skipped
+        self._seen_keys: set[str] = set()
+        self.failed_pages: set[int] = set()
+        self.pages_processed = 0
         self.total_pages = None
+        # page_urls[n - 1] is the URL of page n; filled in once total_pages is known
+        self.page_urls = [self.base_url]
+        self.browser = None
+        self.pool = None
+        self.session = None
+        self._products_lock = asyncio.Lock()
+        self._failed_lock = asyncio.Lock()
+        self.output_file = 'skinnora_products.jsonl'
+        self.meta_file = 'skinnora_meta.json'
+        self._writer_queue = asyncio.Queue()
+        self._writer_task = None
+        self._fetch_semaphore = asyncio.Semaphore(concurrency)
+        # Politeness is an aggregate request rate shared by all workers
+        self.limiter = AsyncLimiter(max_rate=5, time_period=1.0)
         
     async def setup_browser(self):
         """Initialize browser with proper error handling"""
         try:
-            playwright = await async_playwright().start()
-            browser = await playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-web-security',
-                    '--disable-features=IsolateOrigins,site-per-process'
-                ]
-            )
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 800},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page = await context.new_page()
-            
-            # Set default timeout
-            page.set_default_timeout(self.timeout)
-            
-            # Add error handlers
-            page.on('pageerror', lambda err: logger.error(f"Page error: {err}"))
-            page.on('requestfailed', lambda request: logger.warning(f"Request failed: {request.url} - {request.failure}"))
-            
-            return playwright, browser, context, page
+            playwright = await get_playwright()
+            browser = await playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+            pool = await ContextPool(browser, self.concurrency, **CONTEXT_OPTIONS).start()
+            await pool.route('**/*', block_unneeded_requests)
+            await pool.add_init_script(EXTRACTOR_JS)
+            
+            return browser, pool
             
         except Exception as e:
-            logger.error(f"Failed to setup browser: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Failed to setup browser: {e}")
             raise
 
+    async def new_page(self, context):
+        """Open a page in a pooled context, configured for scraping"""
+        page = await context.new_page()
+        
+        # Set default timeout
+        page.set_default_timeout(self.timeout)
+        
+        # Add error handlers
+        page.on('pageerror', lambda err: logger.error(f"Page error: {err}"))
+        page.on('requestfailed', log_request_failed)
+        
+        return page
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """Create the shared HTTP session used to fetch listing pages"""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=64),
+            headers={'User-Agent': USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=self.timeout / 1000)
+        )
+
+    async def fetch_page_html(self, url: str) -> Optional[str]:
+        """Fetch a page's HTML with retries and exponential backoff"""
+        for attempt in range(self.max_retries):
+            try:
+                async with self._fetch_semaphore, self.limiter:
+                    logger.info(f"Fetching: {url} (attempt {attempt + 1}/{self.max_retries})")
+                    async with self.session.get(url) as response:
+                        if response.status == 200:
+                            return await response.text()
+                        
+                        logger.warning(f"HTTP {response.status} for {url}")
+                        if response.status == 404:
+                            return None
+                        
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request to {url} failed: {e}")
+                logger.debug("%s", e, exc_info=True)
+            
+            if attempt < self.max_retries - 1:
+                delay = 2 ** attempt + random.uniform(0, 1)
+                logger.info(f"Retrying in {delay:.1f}s... ({attempt + 2}/{self.max_retries})")
+                await asyncio.sleep(delay)
+        
+        return None
+
+    def parse_products(self, tree: LexborHTMLParser, page_url: str) -> List[Dict]:
+        """Extract product data from a parsed listing page"""
+        products = []
+        scraped_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        
+        for index, product in enumerate(tree.css(SELECTORS['product']), 1):
+            name_element = product.css_first(SELECTORS['name'])
+            name = name_element.text().strip() if name_element is not None else ''
+            
+            if not name:
+                logger.debug(f"Product {index} has no name, skipping")
+                continue
+            
+            regular_price = ''
+            sale_price = ''
+            price_element = product.css_first(SELECTORS['price'])
+            if price_element is not None:
+                sale_ins = price_element.css_first('ins')
+                sale_del = price_element.css_first('del')
+                
+                if sale_ins is not None and sale_del is not None:
+                    regular_price = sale_del.text().strip()
+                    sale_price = sale_ins.text().strip()
+                else:
+                    regular_price = price_element.text().strip()
+            
+            link_element = product.css_first(SELECTORS['link'])
+            product_url = link_element.attributes.get('href') if link_element is not None else None
+            
+            image_element = product.css_first(SELECTORS['image'])
+            image_url = image_element.attributes.get('src') if image_element is not None else None
+            
+            categories_element = product.css_first(SELECTORS['categories'])
+            sku_element = product.css_first(SELECTORS['sku'])
+            
+            products.append({
+                'index': index,
+                'name': name,
+                'regular_price': regular_price,
+                'sale_price': sale_price,
+                'is_on_sale': product.css_first(SELECTORS['sale_badge']) is not None,
+                'product_url': urljoin(page_url, product_url) if product_url else '',
+                'image_url': urljoin(page_url, image_url) if image_url else '',
+                'categories': categories_element.text().strip() if categories_element is not None else '',
+                'sku': sku_element.text().replace('SKU:', '').strip() if sku_element is not None else '',
+                'scraped_at': scraped_at
+            })
+        
+        return products
+
+    @staticmethod
+    def parse_total_pages(tree: LexborHTMLParser) -> int:
+        """Read the highest page number from a parsed listing page's pagination"""
+        pagination = tree.css_first('nav.woocommerce-pagination')
+        if pagination is None:
+            return 1
+        
+        page_numbers = set()
+        for element in pagination.css('.page-numbers'):
+            match = re.match(r'\s*(\d+)', element.text())
+            if match:
+                page_numbers.add(int(match.group(1)))
+        
+        return max(page_numbers) if page_numbers else 1
+
     async def safe_goto(self, page, url: str, retry_count: int = 0) -> bool:
-        """Navigate to URL with retry logic"""
+        """Navigate to URL and wait for the product grid, with retry logic"""
         try:
             logger.info(f"Navigating to: {url} (attempt {retry_count + 1}/{self.max_retries})")
             
-            # Try different wait strategies
-            strategies = ['networkidle', 'domcontentloaded', 'load']
-            
-            for strategy in strategies:
-                try:
-                    await page.goto(url, wait_until=strategy, timeout=self.timeout)
-                    logger.info(f"Successfully loaded with {strategy} strategy")
-                    return True
-                except Exception as e:
-                    logger.warning(f"Failed with {strategy} strategy: {str(e)}")
-                    continue
-            
-            # If all strategies fail, try one last time with minimal waiting
-            await page.goto(url, wait_until='commit', timeout=self.timeout)
-            await asyncio.sleep(2)  # Give it some time to load
+            # Don't wait for the page to finish loading; the page is ready as
+            # soon as the product grid is in the DOM
+            async with self.limiter:
+                await page.goto(url, wait_until='commit', timeout=self.timeout)
+            await page.wait_for_selector(SELECTORS['product'], timeout=self.timeout)
             return True
             
         except PlaywrightTimeoutError:
@@ -94,427 +410,366 @@ class SkinnoraScraper:
             return False
             
         except Exception as e:
-            logger.error(f"Failed to load {url}: {e}")
-            logger.error(traceback.format_exc())
-            return False
-
-    async def safe_wait_for_selector(self, page, selector: str, timeout: int = 10000) -> bool:
-        """Wait for selector with error handling"""
-        try:
-            await page.wait_for_selector(selector, timeout=timeout, state='visible')
-            return True
-        except PlaywrightTimeoutError:
-            logger.warning(f"Timeout waiting for selector: {selector}")
-            return False
-        except Exception as e:
-            logger.error(f"Error waiting for selector {selector}: {e}")
+            logger.exception(f"Failed to load {url}: {e}")
             return False
 
     async def extract_product_data(self, page) -> List[Dict]:
-        """Extract product data with error handling"""
+        """Extract product data (and, on the first page, the page count) in one evaluate"""
         try:
-            # Check if products exist
-            product_count = await page.evaluate('''
-                () => {
-                    const products = document.querySelectorAll('.products li.product');
-                    return products.length;
-                }
-            ''')
-            
-            if product_count == 0:
-                logger.warning("No products found on page")
-                return []
-            
-            logger.info(f"Found {product_count} products on page")
+            # The extractor is preinstalled on every context (see EXTRACTOR_JS)
+            result = await page.evaluate('(SEL) => window.__skinnora_extract(SEL)', SELECTORS)
             
-            # Extract data with detailed error handling
-            products = await page.evaluate('''
-                () => {
-                    const products = [];
-                    const productElements = document.querySelectorAll('.products li.product');
-                    
-                    productElements.forEach((product, index) => {
-                        try {
-                            // Get product name with multiple selector attempts
-                            const nameSelectors = [
-                                '.woocommerce-loop-product__title',
-                                'h2',
-                                '.product-title',
-                                '[itemprop="name"]'
-                            ];
-                            
-                            let name = '';
-                            for (const selector of nameSelectors) {
-                                const element = product.querySelector(selector);
-                                if (element && element.textContent) {
-                                    name = element.textContent.trim();
-                                    break;
-                                }
-                            }
-                            
-                            // Get price with multiple selector attempts
-                            const priceSelectors = [
-                                '.price',
-                                '.amount',
-                                '.woocommerce-Price-amount'
-                            ];
-                            
-                            let regularPrice = '';
-                            let salePrice = '';
-                            
-                            for (const selector of priceSelectors) {
-                                const priceElement = product.querySelector(selector);
-                                if (priceElement) {
-                                    const saleIns = priceElement.querySelector('ins');
-                                    const saleDel = priceElement.querySelector('del');
-                                    
-                                    if (saleIns && saleDel) {
-                                        regularPrice = saleDel.textContent.trim();
-                                        salePrice = saleIns.textContent.trim();
-                                    } else {
-                                        regularPrice = priceElement.textContent.trim();
-                                    }
-                                    break;
-                                }
-                            }
-                            
-                            // Get product URL
-                            const linkSelectors = [
-                                'a.woocommerce-LoopProduct-link',
-                                'a[href*="product"]',
-                                '.product-title a'
-                            ];
-                            
-                            let productUrl = '';
-                            for (const selector of linkSelectors) {
-                                const element = product.querySelector(selector);
-                                if (element && element.href) {
-                                    productUrl = element.href;
-                                    break;
-                                }
-                            }
-                            
-                            // Get image URL
-                            const imageSelectors = [
-                                'img',
-                                '.wp-post-image',
-                                '.attachment-woocommerce_thumbnail'
-                            ];
-                            
-                            let imageUrl = '';
-                            for (const selector of imageSelectors) {
-                                const element = product.querySelector(selector);
-                                if (element && element.src) {
-                                    imageUrl = element.src;
-                                    break;
-                                }
-                            }
-                            
-                            // Get categories
-                            const categoriesElement = product.querySelector('.loop-product-categories');
-                            const categories = categoriesElement ? categoriesElement.textContent.trim() : '';
-                            
-                            // Get sale badge
-                            const saleBadge = !!product.querySelector('.onsale');
-                            
-                            // Get SKU if available
-                            const skuElement = product.querySelector('.product-sku');
-                            const sku = skuElement ? skuElement.textContent.replace('SKU:', '').trim() : '';
-                            
-                            if (name) {
-                                products.push({
-                                    index: index + 1,
-                                    name: name,
-                                    regular_price: regularPrice,
-                                    sale_price: salePrice,
-                                    is_on_sale: saleBadge,
-                                    product_url: productUrl,
-                                    image_url: imageUrl,
-                                    categories: categories,
-                                    sku: sku,
-                                    scraped_at: new Date().toISOString()
-                                });
-                            } else {
-                                console.log(`Product ${index + 1} has no name, skipping`);
-                            }
-                            
-                        } catch (error) {
-                            console.log(`Error parsing product ${index + 1}:`, error);
-                        }
-                    });
-                    
-                    return products;
-                }
-            ''')
+            if self.total_pages is None:
+                self.total_pages = result['total_pages']
+                logger.info(f"Total pages detected: {self.total_pages}")
             
+            products = result['products']
             logger.info(f"Successfully extracted {len(products)} products")
             return products
             
         except Exception as e:
-            logger.error(f"Failed to extract product data: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Failed to extract product data: {e}")
             return []
 
-    async def get_total_pages(self, page) -> int:
-        """Get total number of pages with error handling"""
-        try:
-            total_pages = await page.evaluate('''
-                () => {
-                    try {
-                        const pagination = document.querySelector('nav.woocommerce-pagination');
-                        if (!pagination) return 1;
-                        
-                        const pageNumbers = new Set();
-                        
-                        // Get all page number links
-                        pagination.querySelectorAll('.page-numbers').forEach(el => {
-                            const text = el.textContent.trim();
-                            const num = parseInt(text);
-                            if (!isNaN(num)) {
-                                pageNumbers.add(num);
-                            }
-                        });
-                        
-                        // Also check for last page link
-                        const lastLink = pagination.querySelector('a.page-numbers:not(.next):not(.prev)');
-                        if (lastLink) {
-                            const lastNum = parseInt(lastLink.textContent);
-                            if (!isNaN(lastNum)) {
-                                pageNumbers.add(lastNum);
-                            }
-                        }
-                        
-                        // Check current page indicator
-                        const currentSpan = pagination.querySelector('span.page-numbers.current');
-                        if (currentSpan) {
-                            const currentNum = parseInt(currentSpan.textContent);
-                            if (!isNaN(currentNum)) {
-                                pageNumbers.add(currentNum);
-                            }
-                        }
-                        
-                        const numbers = Array.from(pageNumbers);
-                        return numbers.length > 0 ? Math.max(...numbers) : 1;
-                        
-                    } catch (error) {
-                        console.log('Error getting total pages:', error);
-                        return 1;
-                    }
-                }
-            ''')
-            
-            logger.info(f"Total pages detected: {total_pages}")
-            return total_pages
-            
-        except Exception as e:
-            logger.error(f"Failed to get total pages: {e}")
-            return 1  # Assume single page if detection fails
+    async def load_page_http(self, page_num: int, url: str) -> Optional[List[Dict]]:
+        """Fetch and parse a page over plain HTTP; None means the page failed to load"""
+        html = await self.fetch_page_html(url)
+        if html is None:
+            return None
+        
+        tree = LexborHTMLParser(html)
+        if self.total_pages is None:
+            self.total_pages = self.parse_total_pages(tree)
+            logger.info(f"Total pages detected: {self.total_pages}")
+        
+        products = self.parse_products(tree, url)
+        logger.info(f"Successfully extracted {len(products)} products")
+        return products
 
-    async def scrape_page(self, page, page_num: int) -> bool:
+    async def load_page_browser(self, page_num: int, url: str) -> Optional[List[Dict]]:
+        """Render a page on a pooled context; None means the page failed to load"""
+        async with self.pool.acquire() as context:
+            page = await self.new_page(context)
+            try:
+                # Navigate to page and wait for the products
+                if not await self.safe_goto(page, url):
+                    # Take screenshot for debugging
+                    if self.debug:
+                        await page.screenshot(path=f'error_page_{page_num}.jpg', type='jpeg', quality=40)
+                    return None
+                
+                # Take screenshot for verification (optional)
+                if self.debug and page_num % 10 == 0:  # Every 10th page
+                    await page.screenshot(path=f'page_{page_num}_verification.jpg', type='jpeg', quality=40)
+                    logger.info(f"Verification screenshot saved for page {page_num}")
+                
+                # Extract product data
+                return await self.extract_product_data(page)
+            finally:
+                await page.close()
+
+    async def scrape_page(self, page_num: int) -> bool:
         """Scrape a single page with comprehensive error handling"""
         try:
-            # Construct URL
-            url = self.base_url if page_num == 1 else f"{self.base_url}/page/{page_num}/"
+            url = self.page_urls[page_num - 1]
             logger.info(f"Processing page {page_num}: {url}")
             
-            # Navigate to page
-            if not await self.safe_goto(page, url):
-                self.failed_pages.append(page_num)
-                logger.error(f"Failed to load page {page_num}")
-                return False
-            
-            # Wait for content with multiple attempts
-            content_found = False
-            content_selectors = [
-                '.products li.product',
-                '.products',
-                '.woocommerce-loop-product__title',
-                '.product'
-            ]
-            
-            for selector in content_selectors:
-                if await self.safe_wait_for_selector(page, selector, timeout=5000):
-                    content_found = True
-                    logger.info(f"Content found with selector: {selector}")
-                    break
+            if self.use_browser:
+                products = await self.load_page_browser(page_num, url)
+            else:
+                products = await self.load_page_http(page_num, url)
             
-            if not content_found:
-                logger.warning(f"No content found on page {page_num}")
-                # Take screenshot for debugging
-                await page.screenshot(path=f'error_page_{page_num}.png')
+            if products is None:
+                async with self._failed_lock:
+                    self.failed_pages.add(page_num)
+                logger.error(f"Failed to load page {page_num}")
                 return False
             
-            # Take screenshot for verification (optional)
-            if page_num % 10 == 0:  # Every 10th page
-                await page.screenshot(path=f'page_{page_num}_verification.png')
-                logger.info(f"Verification screenshot saved for page {page_num}")
-            
-            # Extract product data
-            products = await self.extract_product_data(page)
-            
             if products:
-                self.all_products.extend(products)
-                logger.info(f"Page {page_num}: Scraped {len(products)} products (Total: {len(self.all_products)})")
+                async with self._products_lock:
+                    new_products = []
+                    for product in products:
+                        key = self.product_key(product)
+                        if key in self._seen_keys:
+                            continue
+                        self._seen_keys.add(key)
+                        new_products.append(product)
+                    
+                    self.total_products += len(new_products)
+                    self.products_on_sale += sum(1 for p in new_products if p['is_on_sale'])
+                for product in new_products:
+                    self._writer_queue.put_nowait(product)
+                
+                if len(new_products) < len(products):
+                    logger.info(f"Page {page_num}: Skipped {len(products) - len(new_products)} products already seen")
+                logger.info(f"Page {page_num}: Scraped {len(new_products)} products (Total: {self.total_products})")
                 return True
             else:
                 logger.warning(f"Page {page_num}: No products extracted")
                 return False
-                
+            
         except Exception as e:
-            logger.error(f"Unexpected error scraping page {page_num}: {e}")
-            logger.error(traceback.format_exc())
-            self.failed_pages.append(page_num)
+            logger.exception(f"Unexpected error scraping page {page_num}: {e}")
+            async with self._failed_lock:
+                self.failed_pages.add(page_num)
             return False
 
+    async def start(self):
+        """Open the HTTP session, or the browser and context pool when rendering"""
+        if self.use_browser:
+            self.browser, self.pool = await self.setup_browser()
+        else:
+            self.session = self.create_session()
+
+    async def close(self):
+        """Release everything opened by start()"""
+        if self.session:
+            await self.session.close()
+        if self.pool:
+            await self.pool.close()
+        if self.browser:
+            await self.browser.close()
+
+    async def _writer(self, mode: str = 'a'):
+        """Append queued products to the JSONL output until a None sentinel arrives"""
+        async with aiofiles.open(self.output_file, mode + 'b') as f:
+            while True:
+                product = await self._writer_queue.get()
+                
+                # Drain whatever else is already queued so each flush is one write
+                lines = []
+                while product is not None:
+                    lines.append(orjson.dumps(product, option=orjson.OPT_APPEND_NEWLINE))
+                    try:
+                        product = self._writer_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                
+                if lines:
+                    await f.write(b''.join(lines))
+                    await f.flush()
+                
+                if product is None:
+                    return
+
+    @staticmethod
+    def product_key(product: Dict) -> str:
+        """Identify a product for de-duplication: its URL, or its name and prices when it has none"""
+        if product.get('product_url'):
+            return product['product_url']
+        return f"{product.get('name')}|{product.get('regular_price')}|{product.get('sale_price')}"
+
+    def load_seen_urls(self):
+        """Preload the products already in the JSONL output so a resumed run doesn't repeat them"""
+        if not os.path.exists(self.output_file):
+            return
+        
+        complete_bytes = 0
+        with open(self.output_file, 'r+b') as f:
+            for line in f:
+                # Every product is written with its newline, so a line without one
+                # is the partial last write of an interrupted run
+                if not line.endswith(b'\n'):
+                    logger.warning(f"Dropping incomplete last line of {self.output_file}")
+                    break
+                complete_bytes += len(line)
+                
+                if not line.strip():
+                    continue
+                try:
+                    product = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line in {self.output_file}: {line[:80]!r}")
+                    continue
+                
+                self._seen_keys.add(self.product_key(product))
+                self.total_products += 1
+                self.products_on_sale += bool(product.get('is_on_sale'))
+            
+            # Cut off a partial last line so the products appended next start on a line of their own
+            f.truncate(complete_bytes)
+        
+        logger.info(f"Loaded {self.total_products} products from {self.output_file}")
+
+    def start_writer(self, append: bool = False):
+        self._writer_task = asyncio.create_task(self._writer('a' if append else 'w'))
+
+    async def stop_writer(self):
+        """Flush the remaining queued products and wait for the writer to finish"""
+        if self._writer_task is None:
+            return
+        
+        self._writer_queue.put_nowait(None)
+        try:
+            await self._writer_task
+        except Exception as e:
+            logger.exception(f"JSONL writer failed: {e}")
+        self._writer_task = None
+
+    def export_json_array(self, filename: str):
+        """Copy the JSONL output into a JSON array file, one line at a time"""
+        with open(self.output_file, 'r', encoding='utf-8') as src, open(filename, 'w', encoding='utf-8') as dst:
+            dst.write('[')
+            separator = '\n'
+            for line in src:
+                line = line.strip()
+                if line:
+                    dst.write(separator + line)
+                    separator = ',\n'
+            dst.write('\n]\n')
+
+    @staticmethod
+    def _write_json(payload, filename: str):
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+
     async def save_progress(self):
+        """Write the run summary sidecar; the products themselves are in the JSONL output"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = 'skinnora_products.json'
+            payload = {
+                'scraped_at': timestamp,
+                'total_products': self.total_products,
+                'total_pages': self.total_pages,
+                'pages_scraped': self.pages_processed,
+                'failed_pages': sorted(self.failed_pages),
+                'products_file': self.output_file
+            }
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'scraped_at': timestamp,
-                    'total_products': len(self.all_products),
-                    'pages_scraped': self.current_page - 1,
-                    'failed_pages': self.failed_pages,
-                    'products': self.all_products
-                }, f, indent=2, ensure_ascii=False)
+            # Keep file I/O off the event loop
+            await asyncio.to_thread(self._write_json, payload, self.meta_file)
             
-            logger.info(f"Progress saved to {filename}")
-            return filename
+            logger.info(f"Run summary saved to {self.meta_file}")
+            return self.output_file
             
         except Exception as e:
             logger.error(f"Failed to save progress: {e}")
             return None
 
-    async def scrape_all_pages(self):
-        """Main method to scrape all pages with comprehensive error handling"""
-        playwright, browser, context, page = None, None, None, None
+    async def process_page(self, page_num: int):
+        success = await self.scrape_page(page_num)
+        
+        if not success:
+            logger.warning(f"Page {page_num} failed, continuing to next page")
         
+        self.pages_processed += 1
+
+    async def worker(self, queue: asyncio.Queue):
+        """Scrape page numbers from the queue until it is empty"""
+        while True:
+            try:
+                page_num = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            await self.process_page(page_num)
+
+    async def scrape_all_pages(self, resume: bool = False):
+        """Main method to scrape all pages with comprehensive error handling"""
         try:
-            # Setup browser
-            playwright, browser, context, page = await self.setup_browser()
-            
-            # Get first page to determine total pages
-            logger.info("Loading first page to determine total pages...")
-            if not await self.safe_goto(page, self.base_url):
+            # Setup HTTP session (or browser)
+            await self.start()
+            
+            # Products are appended to the JSONL output as pages complete
+            # (on resume, appended after the products that are already there)
+            if resume:
+                await asyncio.to_thread(self.load_seen_urls)
+            self.start_writer(append=resume)
+            
+            # The first page's extraction also reports the total page count
+            logger.info("Scraping first page to determine total pages...")
+            await self.process_page(1)
+            if self.total_pages is None:
                 raise Exception("Failed to load first page")
-            
-            if not await self.safe_wait_for_selector(page, '.products li.product'):
-                logger.warning("No products found on first page")
-            
-            self.total_pages = await self.get_total_pages(page)
             logger.info(f"Starting scrape of {self.total_pages} pages")
-            
-            # Scrape each page
-            for page_num in range(1, self.total_pages + 1):
-                self.current_page = page_num
-                
-                success = await self.scrape_page(page, page_num)
-                
-                if not success:
-                    logger.warning(f"Page {page_num} failed, continuing to next page")
+            self.page_urls = [self.base_url] + [f"{self.base_url}/page/{i}/" for i in range(2, self.total_pages + 1)]
+            
+            remaining_pages = range(2, self.total_pages + 1)
+            if self.use_browser:
+                # Scrape the remaining pages concurrently: workers pull page numbers off the queue
+                queue = asyncio.Queue()
+                for page_num in remaining_pages:
+                    queue.put_nowait(page_num)
                 
-                # Save progress every 10 pages
-                if page_num % 10 == 0:
-                    await self.save_progress()
-                
-                # Be respectful to server
-                await asyncio.sleep(2)
+                workers = min(self.concurrency, len(remaining_pages))
+                logger.info(f"Scraping with {workers} concurrent workers")
+                await asyncio.gather(*(self.worker(queue) for _ in range(workers)))
+            else:
+                # Plain HTTP: issue every page at once and let the fetch
+                # semaphore and rate limiter bound what is in flight
+                logger.info(f"Fetching {len(remaining_pages)} pages with up to {self.concurrency} in flight")
+                await asyncio.gather(*(self.process_page(page_num) for page_num in remaining_pages))
             
-            # Final save
+            # Flush the remaining products and write the run summary
+            await self.stop_writer()
             final_file = await self.save_progress()
             
             # Print summary
             logger.info("=" * 60)
             logger.info("SCRAPE COMPLETED")
             logger.info("=" * 60)
-            logger.info(f"Total products scraped: {len(self.all_products)}")
-            logger.info(f"Pages processed: {self.current_page}")
+            logger.info(f"Total products scraped: {self.total_products}")
+            logger.info(f"Pages processed: {self.pages_processed}")
             logger.info(f"Failed pages: {len(self.failed_pages)}")
             if self.failed_pages:
-                logger.info(f"Failed page numbers: {self.failed_pages}")
+                logger.info(f"Failed page numbers: {sorted(self.failed_pages)}")
             logger.info(f"Data saved to: {final_file}")
             
-            # Calculate statistics
-            products_on_sale = sum(1 for p in self.all_products if p.get('is_on_sale'))
-            logger.info(f"Products on sale: {products_on_sale}")
-            logger.info(f"Regular price products: {len(self.all_products) - products_on_sale}")
+            # Statistics
+            logger.info(f"Products on sale: {self.products_on_sale}")
+            logger.info(f"Regular price products: {self.total_products - self.products_on_sale}")
             
         except Exception as e:
-            logger.error(f"Fatal error during scraping: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Fatal error during scraping: {e}")
             
             # Save whatever we have
-            if self.all_products:
+            await self.stop_writer()
+            await self.save_progress()
+            if self.total_products:
                 emergency_file = f'emergency_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-                with open(emergency_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.all_products, f, indent=2, ensure_ascii=False)
+                await asyncio.to_thread(self.export_json_array, emergency_file)
                 logger.info(f"Emergency backup saved to {emergency_file}")
             
         finally:
             # Clean up
-            if page:
-                await page.close()
-            if context:
-                await context.close()
-            if browser:
-                await browser.close()
-            if playwright:
-                await playwright.stop()
-
-async def test_scraper():
+            await self.stop_writer()
+            await self.close()
+
+async def test_scraper(use_browser: bool = False):
     """Quick test function"""
-    scraper = SkinnoraScraper(headless=False, max_retries=2)
-    
-    playwright, browser, context, page = None, None, None, None
+    scraper = SkinnoraScraper(max_retries=2, use_browser=use_browser)
     
     try:
-        playwright, browser, context, page = await scraper.setup_browser()
+        await scraper.start()
         
         logger.info("Running quick test on first page...")
         
-        if await scraper.safe_goto(page, scraper.base_url):
-            if await scraper.safe_wait_for_selector(page, '.products li.product', timeout=5000):
-                products = await scraper.extract_product_data(page)
-                logger.info(f"Test successful! Found {len(products)} products on first page")
-                
-                # Display first 3 products
-                for i, product in enumerate(products[:3], 1):
-                    logger.info(f"Sample {i}: {product['name']} - {product['regular_price']}")
-                
-                return True
-            else:
-                logger.error("Test failed: No products found")
-                return False
+        url = scraper.page_urls[0]
+        if use_browser:
+            products = await scraper.load_page_browser(1, url)
         else:
+            products = await scraper.load_page_http(1, url)
+        
+        if products is None:
             logger.error("Test failed: Could not load page")
             return False
+        if not products:
+            logger.error("Test failed: No products found")
+            return False
+        
+        logger.info(f"Test successful! Found {len(products)} products on first page")
+        
+        # Display first 3 products
+        for i, product in enumerate(products[:3], 1):
+            logger.info(f"Sample {i}: {product['name']} - {product['regular_price']}")
+        
+        return True
             
     finally:
-        if page:
-            await page.close()
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if playwright:
-            await playwright.stop()
+        await scraper.close()
 
-async def main():
-    """Main function with error recovery options"""
-    logger.info("=" * 60)
-    logger.info("SKINNORA SCRAPER - ENHANCED VERSION")
-    logger.info("=" * 60)
-    
-    # Ask user for mode
-    print("\nSelect mode:")
-    print("1. Run test only")
-    print("2. Run full scrape")
-    print("3. Resume from failed pages")
-    
-    choice = input("Enter choice (1/2/3): ").strip()
-    
+async def run_choice(choice: str):
+    """Run the mode picked in main"""
     if choice == "1":
         # Run test only
         logger.info("Running test mode...")
@@ -527,17 +782,37 @@ async def main():
     elif choice == "2":
         # Run full scrape
         logger.info("Running full scrape...")
-        scraper = SkinnoraScraper(headless=False, max_retries=3)
+        scraper = SkinnoraScraper(max_retries=3)
         await scraper.scrape_all_pages()
         
     elif choice == "3":
-        # Resume from failed pages
-        # This would need previous failed pages data
-        logger.info("Resume functionality requires previous run data")
-        logger.info("Please run full scrape instead")
+        # Resume: re-run every page, appending only products not already saved
+        logger.info("Resuming scrape...")
+        scraper = SkinnoraScraper(max_retries=3)
+        await scraper.scrape_all_pages(resume=True)
         
     else:
         logger.error("Invalid choice")
 
+async def main():
+    """Main function with error recovery options"""
+    logger.info("=" * 60)
+    logger.info("SKINNORA SCRAPER - ENHANCED VERSION")
+    logger.info("=" * 60)
+    
+    # Ask user for mode
+    print("\nSelect mode:")
+    print("1. Run test only")
+    print("2. Run full scrape")
+    print("3. Resume from failed pages")
+    
+    choice = (await asyncio.to_thread(input, "Enter choice (1/2/3): ")).strip()
+    
+    try:
+        await run_choice(choice)
+    finally:
+        # Shut down the shared Playwright driver, if either mode started it
+        await stop_playwright()
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
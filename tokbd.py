@@ -1,39 +1,262 @@
+import argparse
 import asyncio
+import aiohttp
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-import json
+from selectolax.lexbor import LexborHTMLParser
+import orjson
 import logging
+import logging.handlers
+import atexit
+import queue
+import multiprocessing
+import re
 import sys
-from datetime import datetime
-import traceback
-from typing import List, Dict
+import time
+from collections import deque
+from random import choice, uniform
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
+from urllib.parse import urljoin
+
+# uvloop is optional (and not available on Windows); it's a faster drop-in event loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Configure logging to handle utf-8 properly
 # This prevents cp1252 errors on Windows when printing emojis like ✅, ❌
+# The handlers run on a listener thread, so log writes never block the event loop
+_log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler('tokbd_scraper.log', encoding='utf-8', mode='a'),
+    logging.StreamHandler(sys.stdout),
+    respect_handler_level=True
+)
+for _handler in log_listener.handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+# The queue side only renders the message (and traceback); the listener adds the rest
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tokbd_scraper.log', encoding='utf-8', mode='a'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+log_listener.start()
+# Flushes whatever is still queued when the main process exits
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Force stdout to utf-8 if on windows (handle emoji printing)
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+# A fresh one is picked for every run; all Chromium-based so the UA matches the engine
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0'
+]
+VIEWPORT_WIDTHS = [1280, 1366, 1440, 1536]
+VIEWPORT_HEIGHTS = [720, 800, 900]
+
+# Static-HTML parsing mirrors the in-page extractor
+CARD_SELECTOR = 'div.grid > div.flex.flex-col.h-full.w-full.bg-white'
+CARD_FIELDS_SELECTOR = ', '.join([
+    'a[href^="/products/"]',
+    'h3.line-clamp-2', r'h3.text-\[14px\]',
+    r'p.font-semibold.text-\[18px\]',
+    'img[src]',
+    'span.bg-emerald-100', 'span.text-emerald-700'
+])
+PRICE_RE = re.compile(r'([\d,]+)\s*Taka', re.IGNORECASE)
+
+# The same rules for the in-page extractor, installed once per context as
+# window.__SEL so the extractor and card count share one definition.
+# name/stock match any of their classes, price needs all of them.
+BROWSER_SELECTORS = {
+    'card': CARD_SELECTOR,
+    'link': '/products/',
+    'name': ['line-clamp-2', 'text-[14px]'],
+    'price': ['font-semibold', 'text-[18px]'],
+    'stock': ['bg-emerald-100', 'text-emerald-700']
+}
+SELECTORS_JS = f'window.__SEL = Object.freeze({orjson.dumps(BROWSER_SELECTORS).decode()});'
+
+# Installed once per browser context with add_init_script, so pages only send
+# a short call instead of the whole extractor source. Returns raw card rows
+# (see build_products) and how many cards were skipped as already seen.
+EXTRACT_JS = r'''
+window.__extractTokBD = ({baseUrl, seen}) => {
+    const seenUrls = new Set(seen);
+    let skipped = 0;
+    const data = [];
+    const SEL = window.__SEL;
+    const productCards = document.querySelectorAll(SEL.card);
+    const hasAny = (cls, names) => names.some(n => cls.contains(n));
+    const hasAll = (cls, names) => names.every(n => cls.contains(n));
+
+    productCards.forEach((card, index) => {
+        try {
+            // One linear walk over the card's descendants, dispatching on tag
+            // and class, instead of a selector traversal per field. The first
+            // match of each field wins, like querySelector would
+            let linkEl = null, nameEl = null, priceEl = null, imgEl = null, stockEl = null;
+            for (const el of card.getElementsByTagName('*')) {
+                const cls = el.classList;
+                switch (el.tagName) {
+                    case 'A':
+                        if (!linkEl && (el.getAttribute('href') || '').startsWith(SEL.link)) linkEl = el;
+                        break;
+                    case 'H3':
+                        if (!nameEl && hasAny(cls, SEL.name)) nameEl = el;
+                        break;
+                    case 'P':
+                        if (!priceEl && hasAll(cls, SEL.price)) priceEl = el;
+                        break;
+                    case 'IMG':
+                        if (!imgEl && el.hasAttribute('src')) imgEl = el;
+                        break;
+                    case 'SPAN':
+                        if (!stockEl && hasAny(cls, SEL.stock)) stockEl = el;
+                        break;
+                }
+            }
+
+            if (!linkEl) return;
+
+            const relativeUrl = linkEl.getAttribute('href');
+            const fullUrl = new URL(relativeUrl, baseUrl).href;
+            if (seenUrls.has(fullUrl)) {
+                skipped++;
+                return;
+            }
+
+            // Raw fields only; price parsing and the product dicts are built in Python
+            data.push([
+                index + 1,
+                fullUrl,
+                relativeUrl,
+                nameEl ? nameEl.textContent.trim() : '',
+                priceEl ? priceEl.textContent.trim() : '',
+                imgEl ? imgEl.src : '',
+                stockEl ? stockEl.textContent : ''
+            ]);
+        } catch (err) {
+            console.error('Error parsing card:', err);
+        }
+    });
+    return {rows: data, skipped: skipped};
+};
+'''
+
+# Only the DOM text and attributes are read, so none of these need downloading
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet'}
+
+async def block_unneeded_requests(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+def log_request_failed(request):
+    # Requests aborted by block_unneeded_requests also fire requestfailed; keep them out of the warnings
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        logger.debug(f"Request blocked: {request.url}")
+    else:
+        logger.warning(f"Request failed: {request.url} - {request.failure}")
+
+class TokenBucket:
+    """Token-bucket rate limiter that halves its rate when the server answers 429"""
+    
+    def __init__(self, rate_per_sec: float, capacity: int = 1, cooldown: float = 30.0, min_rate: float = 0.25):
+        self.base_rate = rate_per_sec
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.cooldown = cooldown
+        self.min_rate = min_rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._throttled_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        # Go back to the normal rate once the cool-down after the last 429 has passed
+        if self.rate < self.base_rate and now >= self._throttled_until:
+            self.rate = self.base_rate
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+    
+    def throttle(self):
+        """Halve the rate and hold it there for the cool-down window"""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._throttled_until = time.monotonic() + self.cooldown
+        logger.warning(f"Rate limited by server, slowing down to {self.rate:.2f} requests/s for {self.cooldown:.0f}s")
+
 class TokBDScraper:
-    def __init__(self, headless: bool = False, max_retries: int = 3, timeout: int = 30000):
+    def __init__(self, headless: bool = False, max_retries: int = 3, timeout: int = 30000, concurrency: int = 4,
+                 rate_per_sec: float = 2.0, shard_id: Optional[int] = None, shards: int = 1):
         self.base_url = "https://tokbd.com"
         self.headless = headless
         self.max_retries = max_retries
         self.timeout = timeout
-        self.all_products = []
+        # Number of pages loaded at once, each on its own tab in a shared context
+        self.concurrency = concurrency
+        # New products wait here until the next checkpoint appends them to the JSONL file
+        self._pending = deque()
+        self.total_products = 0
         self.failed_pages = []
+        # Exact set rather than a Bloom filter: a false positive would silently
+        # drop a product
         self.seen_urls = set()
+        # Most recently added URLs, sent to the browser so it can skip cards
+        # repeated from neighbouring pages; seen_urls remains the real check
+        self.recent_urls = deque(maxlen=500)
         self.current_page = 1
+        # Final output, built from the JSONL file once the scrape finishes
+        self.output_file = 'tokbd_products.json'
+        self.jsonl_file = 'tokbd_products.jsonl'
+        # Small checkpoint (page counter, failed pages) used to resume
+        self.manifest_file = 'tokbd_progress.json'
+        # A shard only scrapes the page numbers equal to shard_id modulo shards,
+        # into its own files; scrape_sharded merges them afterwards
+        self.shard_id = shard_id
+        self.shards = shards
+        if shard_id is not None:
+            self.jsonl_file = f'tokbd_products.shard_{shard_id}.jsonl'
+            self.manifest_file = f'tokbd_progress.shard_{shard_id}.json'
+        # The catalog is over once this many pages in a row come back empty
+        self.empty_pages_to_stop = 2
+        # ...and the site (or network) is treated as down after this many load failures in a row
+        self.failed_pages_to_stop = 2
+        # Set when that happens, so the run is reported as incomplete
+        self.stopped_early = False
+        self._products_lock = asyncio.Lock()
+        # Screenshot writes still running; kept so they are not garbage collected mid-write
+        self._screenshot_tasks = set()
+        # Shared HTTP session for the static fast path; Playwright is the fallback
+        self.session = None
+        # Browser context and static session present the same client
+        self.user_agent = choice(USER_AGENTS)
+        # Shared by all tabs; lets a batch start together, then paces requests
+        self.rate_limiter = TokenBucket(rate_per_sec, capacity=concurrency)
         
     async def setup_browser(self):
         """Initialize browser with proper error handling"""
@@ -50,56 +273,141 @@ class TokBDScraper:
                 ]
             )
             context = await browser.new_context(
-                viewport={'width': 1280, 'height': 800},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+                viewport={'width': choice(VIEWPORT_WIDTHS), 'height': choice(VIEWPORT_HEIGHTS)},
+                user_agent=self.user_agent
             )
-            page = await context.new_page()
-            
-            # Set default timeout
-            page.set_default_timeout(self.timeout)
+            await context.route('**/*', block_unneeded_requests)
+            await context.add_init_script(script=SELECTORS_JS)
+            await context.add_init_script(script=EXTRACT_JS)
             
-            # Add error handlers
-            page.on('pageerror', lambda err: logger.error(f"Page error: {err}"))
-            page.on('requestfailed', lambda request: logger.warning(f"Request failed: {request.url} - {request.failure}"))
-            
-            return playwright, browser, context, page
+            return playwright, browser, context
             
         except Exception as e:
-            logger.error(f"Failed to setup browser: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Failed to setup browser: {e}")
             raise
 
+    def _on_response(self, response):
+        # Only tokbd's own 429s slow us down; third-party scripts and trackers can rate-limit freely
+        if response.status == 429 and response.url.startswith(self.base_url + '/'):
+            self.rate_limiter.throttle()
+
+    async def new_page(self, context):
+        """Open a tab in the shared context, configured for scraping"""
+        page = await context.new_page()
+        
+        # Set default timeout
+        page.set_default_timeout(self.timeout)
+        
+        # Add error handlers
+        page.on('pageerror', lambda err: logger.error(f"Page error: {err}"))
+        page.on('requestfailed', log_request_failed)
+        page.on('response', self._on_response)
+        
+        return page
+
+    @staticmethod
+    def build_products(rows) -> List[Dict]:
+        """Turn raw card rows (index, url, relative_url, name, price_text, image_url, stock_text) into products"""
+        scraped_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        products = []
+        
+        for index, url, relative_url, name, price_text, image_url, stock_text in rows:
+            if not (name and relative_url):
+                continue
+            
+            match = PRICE_RE.search(price_text)
+            price = match.group(1).replace(',', '') if match else ''
+            
+            products.append({
+                'index': index,
+                'name': name,
+                'price': price,
+                'currency': 'BDT',
+                'price_formatted': f"{price} Taka" if price else '',
+                'url': url,
+                'relative_url': relative_url,
+                'image_url': image_url,
+                'in_stock': 'in stock' in stock_text.lower(),
+                'scraped_at': scraped_at
+            })
+        
+        return products
+
+    def parse_products(self, html: str) -> List[Dict]:
+        """Extract product cards from server-rendered HTML, like extract_product_data does in the browser"""
+        rows = []
+        
+        for index, card in enumerate(LexborHTMLParser(html).css(CARD_SELECTOR), 1):
+            fields = {}
+            for el in card.css(CARD_FIELDS_SELECTOR):
+                fields.setdefault(el.tag, el)
+            
+            link_el = fields.get('a')
+            if link_el is None:
+                continue
+            relative_url = link_el.attributes.get('href') or ''
+            
+            name_el = fields.get('h3')
+            price_el = fields.get('p')
+            img_el = fields.get('img')
+            stock_el = fields.get('span')
+            
+            rows.append((
+                index,
+                urljoin(self.base_url, relative_url),
+                relative_url,
+                name_el.text().strip() if name_el is not None else '',
+                price_el.text().strip() if price_el is not None else '',
+                urljoin(self.base_url, img_el.attributes.get('src') or '') if img_el is not None else '',
+                stock_el.text() if stock_el is not None else ''
+            ))
+        
+        return self.build_products(rows)
+
+    async def probe_static(self, url: str) -> Optional[List[Dict]]:
+        """Fetch a page over plain HTTP; None means the browser is needed"""
+        try:
+            await self.rate_limiter.acquire()
+            async with self.session.get(url) as response:
+                if response.status == 429:
+                    self.rate_limiter.throttle()
+                if response.status != 200:
+                    logger.warning(f"HTTP {response.status} for {url}, falling back to browser")
+                    return None
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Static fetch of {url} failed ({e}), falling back to browser")
+            return None
+        
+        products = self.parse_products(html)
+        if not products:
+            logger.info(f"No product cards in static HTML of {url}, falling back to browser")
+            return None
+        
+        logger.info(f"Successfully extracted {len(products)} products from static HTML")
+        return products
+
     async def safe_goto(self, page, url: str, retry_count: int = 0) -> bool:
         """Navigate to URL with retry logic"""
         try:
             logger.info(f"Navigating to: {url} (attempt {retry_count + 1}/{self.max_retries})")
             
-            strategies = ['networkidle', 'domcontentloaded', 'load']
-            
-            for strategy in strategies:
-                try:
-                    await page.goto(url, wait_until=strategy, timeout=self.timeout)
-                    logger.info(f"Successfully loaded with {strategy} strategy")
-                    return True
-                except Exception as e:
-                    logger.warning(f"Failed with {strategy} strategy: {str(e)}")
-                    continue
-            
-            await page.goto(url, wait_until='commit', timeout=self.timeout)
-            await asyncio.sleep(2)
+            # Product cards are server-rendered; readiness is gated by the content wait in scrape_page
+            await self.rate_limiter.acquire()
+            await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout)
             return True
             
         except PlaywrightTimeoutError:
             logger.error(f"Timeout loading {url}")
             if retry_count < self.max_retries - 1:
-                logger.info(f"Retrying... ({retry_count + 2}/{self.max_retries})")
-                await asyncio.sleep(5 * (retry_count + 1))
+                delay = min(60, 2 ** retry_count + uniform(0, 1))  # Exponential backoff with jitter
+                logger.info(f"Retrying in {delay:.1f}s... ({retry_count + 2}/{self.max_retries})")
+                await asyncio.sleep(delay)
                 return await self.safe_goto(page, url, retry_count + 1)
             return False
             
         except Exception as e:
-            logger.error(f"Failed to load {url}: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Failed to load {url}: {e}")
             return False
 
     async def safe_wait_for_selector(self, page, selector: str, timeout: int = 15000) -> bool:
@@ -114,80 +422,61 @@ class TokBDScraper:
             logger.error(f"Error waiting for selector {selector}: {e}")
             return False
 
-    async def extract_product_data(self, page) -> List[Dict]:
-        """Extract product data exactly like the original code"""
+    async def wait_for_content(self, page, selectors: List[str], timeout: int = 5000) -> Optional[str]:
+        """Wait in the page for the first selector, falling back to the others on timeout; returns the one found, or None"""
+        try:
+            # A MutationObserver watches in the page, so the whole wait is one round-trip.
+            # Only the first selector ends it early: the fallbacks (e.g. the grid itself)
+            # usually exist before the product cards have rendered
+            return await page.evaluate('''([selectors, timeout]) => new Promise(resolve => {
+                const primary = selectors[0];
+                if (document.querySelector(primary)) return resolve(primary);
+                const mo = new MutationObserver(() => {
+                    if (document.querySelector(primary)) { mo.disconnect(); resolve(primary); }
+                });
+                mo.observe(document.body || document.documentElement, {childList: true, subtree: true});
+                setTimeout(() => {
+                    mo.disconnect();
+                    resolve(selectors.find(s => document.querySelector(s)) || null);
+                }, timeout);
+            })''', [selectors, timeout])
+        except Exception as e:
+            logger.error(f"Error waiting for content {selectors}: {e}")
+            return None
+
+    async def extract_product_data(self, page) -> Tuple[List[Dict], int]:
+        """Extract product data, skipping cards whose URL was recently seen; returns (products, skipped)"""
         try:
             # Check if products exist before extracting
-            product_count = await page.evaluate('''() => document.querySelectorAll('div.grid > div.flex.flex-col.h-full.w-full.bg-white').length''')
+            product_count = await page.evaluate('() => document.querySelectorAll(window.__SEL.card).length')
             
             if product_count == 0:
                 logger.warning("No products found on page")
-                return []
+                return [], 0
             
             logger.info(f"Found {product_count} product cards on page")
             
-            products = await page.evaluate(r'''(baseUrl) => {
-                const data = [];
-                const productCards = document.querySelectorAll('div.grid > div.flex.flex-col.h-full.w-full.bg-white');
-                
-                productCards.forEach((card, index) => {
-                    try {
-                        const linkEl = card.querySelector('a[href^="/products/"]');
-                        if (!linkEl) return;
-                        
-                        const relativeUrl = linkEl.getAttribute('href');
-                        const fullUrl = new URL(relativeUrl, baseUrl).href;
-                        
-                        // We need the literal string to have a proper formatted query selector in javascript
-                        // so we search for element with `[14px]` text by using double slash escape
-                        const nameEl = card.querySelector('h3.line-clamp-2, h3.text-\\[14px\\]');
-                        const name = nameEl ? nameEl.textContent.trim() : '';
-                        
-                        const priceEl = card.querySelector('p.font-semibold.text-\\[18px\\]');
-                        let price = '';
-                        let currency = 'BDT';
-                        
-                        if (priceEl) {
-                            const priceText = priceEl.textContent.trim();
-                            const match = priceText.match(/([\d,]+)\s*Taka/i);
-                            if (match) {
-                                price = match[1].replace(/,/g, '');
-                            }
-                        }
-                        
-                        const imgEl = card.querySelector('img[src*="cdn.tokbd.shop"]');
-                        const image_url = imgEl ? imgEl.src : '';
-                        
-                        const stockEl = card.querySelector('span.bg-emerald-100, span.text-emerald-700');
-                        const in_stock = stockEl ? stockEl.textContent.toLowerCase().includes('in stock') : false;
-                        
-                        if (name && relativeUrl) {
-                            data.push({
-                                index: index + 1,
-                                name: name,
-                                price: price,
-                                currency: currency,
-                                price_formatted: price ? `${price} Taka` : '',
-                                url: fullUrl,
-                                relative_url: relativeUrl,
-                                image_url: image_url,
-                                in_stock: in_stock,
-                                scraped_at: new Date().toISOString()
-                            });
-                        }
-                    } catch (err) {
-                        console.error('Error parsing card:', err);
-                    }
-                });
-                return data;
-            }''', self.base_url)
+            result = await page.evaluate('(args) => window.__extractTokBD(args)',
+                                         {'baseUrl': self.base_url, 'seen': list(self.recent_urls)})
             
-            logger.info(f"Successfully extracted {len(products)} products")
-            return products
+            products, skipped = self.build_products(result['rows']), result['skipped']
+            logger.info(f"Successfully extracted {len(products)} products ({skipped} already seen)")
+            return products, skipped
         except Exception as e:
-            logger.error(f"Failed to extract product data: {e}")
-            logger.error(traceback.format_exc())
-            return []
+            logger.exception(f"Failed to extract product data: {e}")
+            return [], 0
+
+    async def save_screenshot(self, page, filename: str, **options):
+        """Capture a screenshot and write it to disk off the event loop"""
+        try:
+            buf = await page.screenshot(full_page=False, **options)
+        except Exception as e:
+            logger.warning(f"Screenshot {filename} failed: {e}")
+            return
+        
+        task = asyncio.create_task(asyncio.to_thread(Path(filename).write_bytes, buf))
+        self._screenshot_tasks.add(task)
+        task.add_done_callback(self._screenshot_tasks.discard)
 
     async def scrape_page(self, page, page_num: int) -> bool:
         """Scrape a single page with comprehensive error handling"""
@@ -195,73 +484,114 @@ class TokBDScraper:
             url = f"{self.base_url}/products?page={page_num}"
             logger.info(f"Processing page {page_num}: {url}")
             
-            if not await self.safe_goto(page, url):
-                self.failed_pages.append(page_num)
-                logger.error(f"Failed to load page {page_num}")
-                return False
-            
-            content_found = False
-            content_selectors = [
-                'div.grid > div.flex.flex-col',
-                'div.grid'
-            ]
+            products = await self.probe_static(url) if self.session else None
+            skipped = 0
             
-            for selector in content_selectors:
-                if await self.safe_wait_for_selector(page, selector, timeout=5000):
-                    content_found = True
-                    logger.info(f"Content found with selector: {selector}")
-                    break
-            
-            if not content_found:
-                logger.warning(f"No content found on page {page_num}")
-                await page.screenshot(path=f'tokbd_error_page_{page_num}.png')
-                return False
+            if products is None:
+                if not await self.safe_goto(page, url):
+                    self.failed_pages.append(page_num)
+                    logger.error(f"Failed to load page {page_num}")
+                    return False
                 
-            if page_num % 10 == 0:
-                await page.screenshot(path=f'tokbd_page_{page_num}_verification.png')
-                logger.info(f"Verification screenshot saved for page {page_num}")
+                content_selectors = [
+                    'div.grid > div.flex.flex-col',
+                    'div.grid'
+                ]
                 
-            await page.wait_for_timeout(1000)
-            products = await self.extract_product_data(page)
-            
-            new_products = []
-            for p in products:
-                if p['url'] not in self.seen_urls:
-                    self.seen_urls.add(p['url'])
-                    new_products.append(p)
+                selector = await self.wait_for_content(page, content_selectors, timeout=5000)
+                if selector:
+                    logger.info(f"Content found with selector: {selector}")
+                else:
+                    logger.warning(f"No content found on page {page_num}")
+                    await self.save_screenshot(page, f'tokbd_error_page_{page_num}.png', type='png')
+                    return False
+                    
+                if page_num % 10 == 0:
+                    await self.save_screenshot(page, f'tokbd_page_{page_num}_verification.jpg', type='jpeg', quality=60)
+                    logger.info(f"Verification screenshot saved for page {page_num}")
+                    
+                products, skipped = await self.extract_product_data(page)
+            
+            async with self._products_lock:
+                new_products = []
+                for p in products:
+                    if p['url'] not in self.seen_urls:
+                        self.seen_urls.add(p['url'])
+                        self.recent_urls.append(p['url'])
+                        new_products.append(p)
+                
+                self._pending.extend(new_products)
+                self.total_products += len(new_products)
             
             if new_products:
-                self.all_products.extend(new_products)
-                logger.info(f"Page {page_num}: Scraped {len(new_products)} products (Total: {len(self.all_products)})")
+                logger.info(f"Page {page_num}: Scraped {len(new_products)} products (Total: {self.total_products})")
                 return True
             else:
                 logger.warning(f"Page {page_num}: No new products extracted")
-                if len(products) == 0:
+                if len(products) == 0 and skipped == 0:
                     # No duplicate overlap - definitely no products at all
                     return False
                 return True
                 
         except Exception as e:
-            logger.error(f"Unexpected error scraping page {page_num}: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Unexpected error scraping page {page_num}: {e}")
             self.failed_pages.append(page_num)
             return False
 
-    async def save_progress(self):
-        """Save current progress to JSON file"""
+    def _append_jsonl(self, products: List[Dict]):
+        with open(self.jsonl_file, 'ab') as f:
+            f.write(b''.join(orjson.dumps(p, option=orjson.OPT_APPEND_NEWLINE) for p in products))
+
+    def _read_jsonl(self) -> List[Dict]:
+        return self._read_jsonl_file(self.jsonl_file)
+
+    @staticmethod
+    def _read_jsonl_file(filename: str) -> List[Dict]:
+        if not Path(filename).exists():
+            return []
+        products = []
+        with open(filename, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    products.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line in {filename}: {line[:80]!r}")
+        return products
+
+    @staticmethod
+    def _write_json(payload, filename: str, option: int = orjson.OPT_APPEND_NEWLINE):
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(payload, option=option))
+
+    async def flush_pending(self):
+        """Append the products scraped since the last flush to the JSONL file"""
+        if not self._pending:
+            return
+        
+        products = list(self._pending)
+        self._pending.clear()
+        await asyncio.to_thread(self._append_jsonl, products)
+
+    async def save_progress(self, completed: bool = False):
+        """Flush new products and save the resume manifest; completed marks a finished scrape"""
         try:
-            filename = 'tokbd_products.json'
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'source': self.base_url,
-                    'scraped_at': datetime.now().isoformat(),
-                    'total_products': len(self.all_products),
-                    'pages_scraped': self.current_page - 1,
-                    'failed_pages': self.failed_pages,
-                    'currency': 'BDT (Taka)',
-                    'products': self.all_products
-                }, f, indent=2, ensure_ascii=False)
+            await self.flush_pending()
+            
+            filename = self.manifest_file
+            payload = {
+                'source': self.base_url,
+                'scraped_at': datetime.now().isoformat(),
+                'total_products': self.total_products,
+                'pages_scraped': self.current_page - 1,
+                'failed_pages': self.failed_pages,
+                'products_file': self.jsonl_file,
+                'completed': completed
+            }
+            
+            # Serialize and write on a worker thread so the scrape keeps going
+            await asyncio.to_thread(self._write_json, payload, filename)
             
             logger.info(f"Progress saved to {filename}")
             return filename
@@ -270,99 +600,279 @@ class TokBDScraper:
             logger.error(f"Failed to save progress: {e}")
             return None
 
+    async def save_output(self) -> List[Dict]:
+        """Build the final JSON file from the JSONL file and return the products"""
+        products = await asyncio.to_thread(self._read_jsonl)
+        payload = {
+            'source': self.base_url,
+            'scraped_at': datetime.now().isoformat(),
+            'total_products': len(products),
+            'pages_scraped': self.current_page - 1,
+            'failed_pages': self.failed_pages,
+            'currency': 'BDT (Taka)',
+            'products': products
+        }
+        await asyncio.to_thread(self._write_json, payload, self.output_file)
+        logger.info(f"Data saved to {self.output_file}")
+        return products
+
     def load_progress(self) -> bool:
         """Load progress from file instead of starting over"""
-        filename = 'tokbd_products.json'
+        # Older runs only have the full output file, which carries the same counters
+        filename = self.manifest_file if Path(self.manifest_file).exists() else self.output_file
         if Path(filename).exists():
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.all_products = data.get('products', [])
-                    self.seen_urls = {p['url'] for p in self.all_products}
-                    self.current_page = data.get('pages_scraped', 0) + 1
-                    self.failed_pages = data.get('failed_pages', [])
-                    logger.info(f"📂 Loaded progress! Starting from page {self.current_page} with {len(self.all_products)} products.")
-                    return True
+                data = orjson.loads(Path(filename).read_bytes())
+                
+                # A finished scrape has nothing left to resume; the next run refreshes every page
+                if data.get('completed'):
+                    logger.info("Last scrape completed, nothing to resume.")
+                    return False
+                
+                if not Path(self.jsonl_file).exists():
+                    # Output from before the JSONL file existed: seed it so later appends follow on
+                    self._append_jsonl(data.get('products', []))
+                
+                # Stream the JSONL file so only the URLs are kept, never the whole product list
+                self.total_products = 0
+                complete_bytes = 0
+                with open(self.jsonl_file, 'r+b') as f:
+                    for line in f:
+                        # Every product is written with its newline, so a line without one
+                        # is the partial last write of an interrupted run
+                        if not line.endswith(b'\n'):
+                            logger.warning(f"Dropping incomplete last line of {self.jsonl_file}")
+                            break
+                        complete_bytes += len(line)
+                        
+                        if not line.strip():
+                            continue
+                        try:
+                            url = orjson.loads(line)['url']
+                        except (orjson.JSONDecodeError, KeyError):
+                            logger.warning(f"Skipping unreadable line in {self.jsonl_file}: {line[:80]!r}")
+                            continue
+                        self.seen_urls.add(url)
+                        self.recent_urls.append(url)
+                        self.total_products += 1
+                    
+                    # Cut off a partial last line so the products appended next start on a line of their own
+                    f.truncate(complete_bytes)
+                self.current_page = data.get('pages_scraped', 0) + 1
+                self.failed_pages = data.get('failed_pages', [])
+                logger.info(f"📂 Loaded progress! Starting from page {self.current_page} with {self.total_products} products.")
+                return True
             except Exception as e:
                 logger.error(f"Failed to load progress: {e}")
         return False
 
-    async def scrape_all_pages(self, max_pages=150):
-        """Main method to scrape all pages with error handling"""
-        playwright, browser, context, page = None, None, None, None
+    def log_summary(self, products: List[Dict]):
+        """Log the end-of-run summary for the final product list"""
+        logger.info("=" * 60)
+        if self.stopped_early:
+            logger.info(f"SCRAPE INCOMPLETE - resume to continue from page {self.current_page}")
+        else:
+            logger.info("SCRAPE COMPLETED")
+        logger.info("=" * 60)
+        logger.info(f"Total products scraped: {len(products)}")
+        logger.info(f"Pages processed: {self.current_page - 1}")
+        logger.info(f"Failed pages: {len(self.failed_pages)}")
+        if self.failed_pages:
+            logger.info(f"Failed page numbers: {self.failed_pages}")
+        logger.info(f"Data saved to: {self.output_file}")
+        
+        products_in_stock = sum(1 for p in products if p.get('in_stock'))
+        logger.info(f"Products in stock: {products_in_stock}")
+        logger.info(f"Out of stock: {len(products) - products_in_stock}")
+
+    async def scrape_all_pages(self, max_pages=150) -> bool:
+        """Main method to scrape all pages with error handling; returns False after a fatal error"""
+        playwright, browser, context, pages = None, None, None, []
         
         try:
-            playwright, browser, context, page = await self.setup_browser()
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8),
+                headers={'User-Agent': self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=self.timeout / 1000)
+            )
+            playwright, browser, context = await self.setup_browser()
+            pages = [await self.new_page(context) for _ in range(self.concurrency)]
             
-            logger.info("Starting scrape of TOKBD...")
+            # A fresh run starts a fresh JSONL file; a resumed one keeps appending
+            if not self.total_products:
+                Path(self.jsonl_file).unlink(missing_ok=True)
             
-            for page_num in range(self.current_page, max_pages + 1):
-                self.current_page = page_num
+            logger.info(f"Starting scrape of TOKBD with {self.concurrency} concurrent pages...")
+            
+            # This run's page numbers, from the first one at or after current_page
+            first_page = self.current_page + ((self.shard_id or 0) - self.current_page) % self.shards
+            page_numbers = range(first_page, max_pages + 1, self.shards)
+            
+            # Scrape pages in batches, one page number per tab
+            consecutive_empty = 0
+            consecutive_failed = []
+            for start in range(0, len(page_numbers), self.concurrency):
+                batch = page_numbers[start:start + self.concurrency]
                 
-                success = await self.scrape_page(page, page_num)
+                results = await asyncio.gather(*(self.scrape_page(pages[i], n) for i, n in enumerate(batch)))
                 
-                if not success:
-                    # Let's check next page to be absolutely sure we've reached the end
-                    logger.info(f"Checking if page {page_num + 1} has products to confirm end of catalog...")
-                    test_success = await self.scrape_page(page, page_num + 1)
-                    if not test_success:
-                        logger.warning(f"Confirmed end of products. Stopping scrape.")
-                        break
+                self.current_page = batch[-1] + 1
+                
+                # Pages that failed to load don't count as empty; a run of them stops the scrape instead
+                for n, success in zip(batch, results):
+                    if success:
+                        consecutive_empty = 0
+                        consecutive_failed = []
+                    elif n in self.failed_pages:
+                        consecutive_failed.append(n)
                     else:
-                        logger.info(f"Page {page_num + 1} had products, continuing...")
-                        self.current_page = page_num + 1
+                        consecutive_empty += 1
+                        consecutive_failed = []
                 
-                if page_num % 5 == 0:
-                    await self.save_progress()
+                if len(consecutive_failed) >= self.failed_pages_to_stop:
+                    # Rewind to the first failed page so a resume scrapes that run again
+                    logger.error(f"{len(consecutive_failed)} pages in a row failed to load. Stopping scrape; resume will restart at page {consecutive_failed[0]}.")
+                    self.current_page = consecutive_failed[0]
+                    self.failed_pages = [n for n in self.failed_pages if n not in consecutive_failed]
+                    self.stopped_early = True
+                    break
+                
+                if consecutive_empty >= self.empty_pages_to_stop:
+                    logger.warning(f"{consecutive_empty} empty pages in a row, reached end of products. Stopping scrape.")
+                    break
                 
-                await asyncio.sleep(2)
+                # Checkpoint every 5 pages of this run
+                if (start + len(batch)) // 5 > start // 5:
+                    await self.save_progress()
             
-            final_file = await self.save_progress()
+            await self.save_progress(completed=not self.stopped_early)
+            if self.shard_id is not None:
+                logger.info(f"Shard {self.shard_id}: {self.total_products} products saved to {self.jsonl_file}")
+                return True
             
-            logger.info("=" * 60)
-            logger.info("SCRAPE COMPLETED")
-            logger.info("=" * 60)
-            logger.info(f"Total products scraped: {len(self.all_products)}")
-            logger.info(f"Pages processed: {self.current_page}")
-            logger.info(f"Failed pages: {len(self.failed_pages)}")
-            if self.failed_pages:
-                logger.info(f"Failed page numbers: {self.failed_pages}")
-            logger.info(f"Data saved to: {final_file}")
-            
-            products_in_stock = sum(1 for p in self.all_products if p.get('in_stock'))
-            logger.info(f"Products in stock: {products_in_stock}")
-            logger.info(f"Out of stock: {len(self.all_products) - products_in_stock}")
+            products = await self.save_output()
+            self.log_summary(products)
+            return True
             
         except Exception as e:
-            logger.error(f"Fatal error during scraping: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Fatal error during scraping: {e}")
             
-            if self.all_products:
+            if self.total_products:
+                await self.save_progress()
                 emergency_file = f'tokbd_emergency_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-                with open(emergency_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.all_products, f, indent=2, ensure_ascii=False)
+                products = await asyncio.to_thread(self._read_jsonl)
+                await asyncio.to_thread(self._write_json, products, emergency_file, orjson.OPT_INDENT_2)
                 logger.info(f"Emergency backup saved to {emergency_file}")
+            return False
             
         finally:
-            if page: await page.close()
+            if self._screenshot_tasks:
+                await asyncio.gather(*self._screenshot_tasks, return_exceptions=True)
+            if self.session: await self.session.close()
+            for page in pages: await page.close()
             if context: await context.close()
             if browser: await browser.close()
             if playwright: await playwright.stop()
 
-async def test_scraper():
+def run_async(coro):
+    """Run a coroutine on uvloop when it is installed"""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+def scrape_shard(shard_id: int, shards: int, max_pages: int, concurrency: int, headless: bool):
+    """Worker process entry point: scrape one shard with its own browser"""
+    # Each process has its own rate limiter, so split the polite rate between them
+    scraper = TokBDScraper(headless=headless, concurrency=concurrency, rate_per_sec=2.0 / shards,
+                           shard_id=shard_id, shards=shards)
+    try:
+        ok = run_async(scraper.scrape_all_pages(max_pages=max_pages))
+    finally:
+        # The pool terminates its workers on exit, which can beat atexit, so flush the
+        # log queue here; unregister the atexit stop, as a second stop fails before 3.12.3
+        log_listener.stop()
+        atexit.unregister(log_listener.stop)
+    # A shard that crashed or gave up on load failures left pages unscraped
+    finished = ok and not scraper.stopped_early
+    return ok, finished, scraper.jsonl_file, scraper.manifest_file, scraper.failed_pages, scraper.current_page - 1
+
+async def scrape_sharded(workers: int = 2, max_pages: int = 150, concurrency: int = 2, headless: bool = False):
+    """Scrape with several browser processes, then merge their shards into the usual output"""
+    logger.info(f"Starting sharded scrape with {workers} worker processes...")
+    
+    # spawn gives every worker a clean interpreter on every platform
+    ctx = multiprocessing.get_context('spawn')
+    # One shard per worker process, since each stops its log listener when done
+    with ctx.Pool(workers, maxtasksperchild=1) as pool:
+        results = await asyncio.to_thread(
+            pool.starmap, scrape_shard,
+            [(shard_id, workers, max_pages, concurrency, headless) for shard_id in range(workers)]
+        )
+    
+    scraper = TokBDScraper(headless=headless)
+    for shard_id, (ok, *_) in enumerate(results):
+        if not ok:
+            logger.error(f"Shard {shard_id} stopped with a fatal error, see the log above")
+    
+    # Like a failed single-process run, leave the previous output alone when there is nothing to merge
+    if not any(ok for ok, *_ in results) or not any(Path(shard_file).exists() for _, _, shard_file, *_ in results):
+        logger.error(f"Sharded scrape produced no products; keeping the existing {scraper.output_file}")
+        return
+    
+    Path(scraper.jsonl_file).unlink(missing_ok=True)
+    
+    # Each shard has covered its own pages below its current page. A resume has
+    # to start at the lowest one left unfinished, or those pages are never scraped
+    unfinished_pages = []
+    finished_pages = 0
+    
+    # Concatenate the shard files, dropping products that showed up in more than one shard
+    for _, finished, shard_file, manifest_file, failed_pages, pages_scraped in results:
+        scraper.failed_pages.extend(failed_pages)
+        if not finished:
+            unfinished_pages.append(pages_scraped)
+        else:
+            finished_pages = max(finished_pages, pages_scraped)
+        
+        if not Path(shard_file).exists():
+            continue
+        
+        for p in await asyncio.to_thread(scraper._read_jsonl_file, shard_file):
+            if p['url'] not in scraper.seen_urls:
+                scraper.seen_urls.add(p['url'])
+                scraper._pending.append(p)
+                scraper.total_products += 1
+        
+        Path(shard_file).unlink()
+        Path(manifest_file).unlink(missing_ok=True)
+    
+    scraper.failed_pages.sort()
+    if unfinished_pages:
+        scraper.current_page = min(unfinished_pages) + 1
+        scraper.stopped_early = True
+    else:
+        scraper.current_page = finished_pages + 1
+    # Failed pages past the resume point get another try when it scrapes them again
+    scraper.failed_pages = [n for n in scraper.failed_pages if n < scraper.current_page]
+    await scraper.save_progress(completed=not scraper.stopped_early)
+    products = await scraper.save_output()
+    scraper.log_summary(products)
+
+async def test_scraper(headless: bool = False):
     """Quick test function"""
-    scraper = TokBDScraper(headless=False, max_retries=2)
+    scraper = TokBDScraper(headless=headless, max_retries=2)
     playwright, browser, context, page = None, None, None, None
     
     try:
-        playwright, browser, context, page = await scraper.setup_browser()
+        playwright, browser, context = await scraper.setup_browser()
+        page = await scraper.new_page(context)
         
         logger.info("Running quick test on page 1...")
         url = f"{scraper.base_url}/products?page=1"
         
         if await scraper.safe_goto(page, url):
             if await scraper.safe_wait_for_selector(page, 'div.grid > div.flex.flex-col', timeout=15000):
-                products = await scraper.extract_product_data(page)
+                products, _ = await scraper.extract_product_data(page)
                 logger.info(f"Test successful! Found {len(products)} products on page 1")
                 
                 for i, product in enumerate(products[:3], 1):
@@ -382,42 +892,49 @@ async def test_scraper():
         if browser: await browser.close()
         if playwright: await playwright.stop()
 
-async def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape product names, prices and stock from TOKBD.")
+    parser.add_argument("--mode", choices=["test", "full", "resume"], default="resume",
+                        help="test: check page 1 only; full: start from the beginning; "
+                             "resume: continue an interrupted scrape, or start over if the last one completed (default)")
+    parser.add_argument("--max-pages", type=int, default=200, help="Last page number to scrape (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=3, help="Pages loaded at once per browser (default: 3)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Browser processes for a full scrape; more than 1 always starts from the beginning (default: 1)")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window instead of running headless (needs a display)")
+    return parser.parse_args()
+
+async def main(args):
     logger.info("=" * 60)
     logger.info("TOKBD SCRAPER - ENHANCED VERSION")
     logger.info("=" * 60)
     
-    print("\nSelect mode:")
-    print("1. Run test only")
-    print("2. Run full scrape (from beginning)")
-    print("3. Resume from last saved progress")
+    headless = not args.headed
     
-    choice = input("Enter choice (1/2/3): ").strip()
-    
-    if choice == "1":
+    if args.mode == "test":
         logger.info("Running test mode...")
-        success = await test_scraper()
+        success = await test_scraper(headless=headless)
         if success:
             logger.info("✅ Test passed! Ready for full scrape.")
         else:
             logger.error("❌ Test failed! Check the website and your connection.")
             
-    elif choice == "2":
+    elif args.workers > 1:
+        logger.info("Running sharded full scrape...")
+        await scrape_sharded(workers=args.workers, max_pages=args.max_pages,
+                             concurrency=args.concurrency, headless=headless)
+        
+    elif args.mode == "full":
         logger.info("Running full scrape...")
-        scraper = TokBDScraper(headless=False)
-        await scraper.scrape_all_pages(max_pages=200)
+        scraper = TokBDScraper(headless=headless, concurrency=args.concurrency)
+        await scraper.scrape_all_pages(max_pages=args.max_pages)
         
-    elif choice == "3":
-        logger.info("Attempting to resume scrape...")
-        scraper = TokBDScraper(headless=False)
-        if scraper.load_progress():
-            await scraper.scrape_all_pages(max_pages=200)
-        else:
-            logger.info("No saved progress found. Starting full scrape from beginning...")
-            await scraper.scrape_all_pages(max_pages=200)
-            
     else:
-        logger.error("Invalid choice")
+        logger.info("Attempting to resume scrape...")
+        scraper = TokBDScraper(headless=headless, concurrency=args.concurrency)
+        if not scraper.load_progress():
+            logger.info("No unfinished scrape to resume. Starting full scrape from beginning...")
+        await scraper.scrape_all_pages(max_pages=args.max_pages)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_async(main(parse_args()))